@@ -2,13 +2,17 @@
 # --- Imports ---
 
 import time
+import threading # Imports the threading module, which is used to run the camera capture in the background
 import datetime # Imports the datetime module for working with dates and times
 import argparse # Imports the argparse module, which provides a way to parse command-line arguments
 import sys # Imports the sys module, which provides access to system-specific parameters and functions
 from functools import lru_cache # Imports the lru_cache decorator from the functools module, which is used to cache the results of function calls
 import cv2 # Imports the OpenCV library for image and video processing
 import numpy # Imports the NumPy library for numerical operations on arrays
-from gpiozero import Servo # Imports the Servo class from the gpiozero module for controlling servo motors
+import robot_logger # Imports the robot_logger module, which collapses repeated messages and rate limits console output
+from video_recorder import VideoRecorder, recording_mode_events # Imports the VideoRecorder class, which encodes frames on a separate thread, and its events mode
+import servo_service # Imports the servo_service module, which owns the camera servo (its pin, position and motion thread)
+from pan_controller import PanController, load_pan_settings, get_bearing # Imports the PID pan controller, which computes the servo target from the person's position
 
 import libcamera # Imports the libcamera module, which provides access to the camera framework
 from picamera2 import MappedArray, Picamera2 # Imports MappedArray and Picamera2 classes for handling camera data and control with the Picamera2 API
@@ -22,22 +26,65 @@ main_loop_update_speed = 0.05
 
 obstacle_width_threshold = 0.25 # Sets the obstacle width threshold to 1/4 of the screen width
 
-last_detections = []
+# --- Category role definitions ---
+
+category_role_ignore = 0
+category_role_person = 1
+category_role_obstacle = 2
+
+person_label = "person"
+
+obstacle_width_thresholds = { # Obstacle labels and the box width (as a fraction of the screen width) above which they count as obstacles
+    "chair": obstacle_width_threshold,
+    "couch": obstacle_width_threshold,
+    "bed": obstacle_width_threshold,
+    "bench": obstacle_width_threshold,
+    "table": obstacle_width_threshold,
+    "tv": obstacle_width_threshold,
+    "potted plant": obstacle_width_threshold,
+    "car": obstacle_width_threshold,
+    "truck": obstacle_width_threshold,
+    "bottle": obstacle_width_threshold,
+    "vase": obstacle_width_threshold,
+    "wall": obstacle_width_threshold,
+    "refrigerator": obstacle_width_threshold,
+    "microwave": obstacle_width_threshold
+}
+
+drop_ignored_categories = False # Flag to drop detections that are neither persons nor obstacles before their coordinates are converted (they are then not drawn or recorded either, so it is off by default)
 
 ignore_dash_labels = False
 
 camera_frame_width = 640
+camera_horizontal_fov = 66 # Horizontal field of view of the camera (in degrees), calibrated by centering an object and turning the servo until it reaches the image edge
 camera_frame_height = 480
 camera_frame_area = camera_frame_width * camera_frame_height
 
 bounding_box_opacity = 0.7
 bounding_box_thickness = 2
 
+label_background_buffer = None # Preallocated frame-sized buffer filled with the label background color
+label_blend_buffer = None # Preallocated frame-sized scratch buffer the label backgrounds are blended into
+
+# --- Coordinate conversion definitions ---
+
+stream_sizes = None # Tuple of (ISP output size, sensor output size, full sensor size), read once after the camera is configured
+coordinate_transform_key = None # The ScalerCrop, ROI and stream sizes that the cached transform was computed for
+coordinate_transform = None # The cached inference-to-ISP transform
+
 # --- Video recording definitions ---
 
 video_recording = True # Flag to enable or disable video recording
 video_recording_fps = 30 # Frames per second for video recording
 video_recording_size = (camera_frame_width, camera_frame_height) # Size of the video recording frame
+video_recording_pool_size = 8 # Number of frames that can wait for the encoder before the oldest one is dropped
+video_recording_directory = "/home/garage/Documents/repositories/The-Stalker-Bot/videos"
+
+video_recording_mode = recording_mode_events # Only record clips around events ("continuous" records every frame)
+video_recording_pre_roll_time = 3 # Seconds of video kept in memory and saved before an event
+video_recording_post_roll_time = 3 # Seconds of video saved after an event
+
+video_recorder = None # Created in the video recording setup
 
 video_status_text = ""
 video_status_text_font = cv2.FONT_HERSHEY_PLAIN
@@ -46,48 +93,205 @@ video_status_text_thickness = 1
 
 # --- Servo definitions ---
 
-servo_maximum_position = 1
-servo_minimum_position = -1
-servo_minimum_pulse_width = 0.5 / 1000
-servo_maximum_pulse_width = 2.5 / 1000
-servo_step = 0.04
-servo_threshold = 0.2
-servo_change_threshold = 0.005
-servo_smooth_speed = 0.005
-servo_step_delay = 0.005
+servo_maximum_position = servo_service.servo_maximum_position
+servo_minimum_position = servo_service.servo_minimum_position
 
 # --- Servo setup ---
 
-servo = Servo(18, min_pulse_width = servo_minimum_pulse_width, max_pulse_width = servo_maximum_pulse_width) # Creates a servo object on GPIO pin 18 with specified pulse widths
-servo_position = 0.0 # Creates a variable for the servo position and initializes its value to 0.0 (center position)
-servo.value = servo_position # Sets the position to "servo_position"
+servo_controller = servo_service.get_servo_controller() # The shared servo, which moves towards its target in the background, starting at 0.0 (center position)
+
+pan_controller_config_path = "pan_controller.json" # JSON file with the pan controller gains (the defaults in "pan_controller" are used for anything missing)
+
+pan_controller = PanController( # Turns the servo towards the person (a PID controller with a deadband)
+    load_pan_settings(pan_controller_config_path),
+    horizontal_fov = camera_horizontal_fov,
+    minimum_position = servo_minimum_position,
+    maximum_position = servo_maximum_position
+)
 
-class Detection:
+class DetectionBatch:
 
     """
-    Represents a single object detection.
+    Represents all object detections of one frame, stored as NumPy arrays (struct-of-arrays).
 
     """
 
-    def __init__(self, coords, category, confidence, metadata):
+    def __init__(self, boxes, categories, confidences):
 
         """
-        Creates a detection object recording the bounding box, the category and the confidence.
+        Creates a detection batch recording the bounding boxes, the categories and the confidences.
 
         Arguments:
-            "coords": The bounding box coordinates (x, y, w, h) as floats in the range [0.0, 1.0]
-            "category": The category index as an integer
-            "confidence": The confidence score as a float in the range [0.0, 1.0]
-            "metadata": The metadata dictionary from the camera
+            "boxes": An N x 4 integer array of bounding boxes (x, y, w, h) in ISP output pixels
+            "categories": An array of N category indices
+            "confidences": An array of N confidence scores in the range [0.0, 1.0]
 
         Returns:
             None
 
         """
 
-        self.category = category
-        self.confidence = confidence
-        self.box = imx500.convert_inference_coords(coords, metadata, picam2)
+        self.boxes = boxes
+        self.categories = categories
+        self.confidences = confidences
+
+    @staticmethod
+    def empty():
+
+        """
+        Creates a detection batch without any detections.
+
+        Arguments:
+            None
+
+        Returns:
+            An empty detection batch
+
+        """
+
+        return DetectionBatch(numpy.zeros((0, 4), dtype = numpy.int32), numpy.zeros(0, dtype = numpy.int32), numpy.zeros(0, dtype = numpy.float32))
+
+last_detections = DetectionBatch.empty() # Creates a variable for the last detections and initializes it to an empty batch
+
+# --- Capture thread definitions ---
+
+capture_thread = None
+capture_running = False
+
+detection_slot = (0, 0.0, 0, last_detections) # Single-slot mailbox of (sequence number, monotonic timestamp, sensor timestamp in ns, detections), replaced as a whole by the capture thread
+
+capture_error_count = 0 # Number of frames the capture thread failed to capture or parse
+capture_error_pause = 0.1 # Time (in seconds) the capture thread waits after an error, so a failing camera doesn't spin the CPU
+
+maximum_tracking_data_age_in_frames = 5 # Published results older than this (in frame durations) are stale, and count as "no person"
+
+# --- Frame latency definitions ---
+
+frame_duration = 1 / 30 # Duration of one frame in seconds, updated from the frame metadata
+maximum_frame_age_in_frames = 1.5 # In latest-only mode, queued frames older than this (in frame durations) are drained if a newer one may be queued behind them
+queued_frame_wait_in_frames = 0.25 # A capture that returns faster than this (in frame durations) took a frame that was already queued
+camera_buffer_count = 12 # Number of camera frame buffers (also the most frames that can be queued, so the most that are drained per capture)
+
+stale_frames_drained = 0 # Number of frames drained because they were already too old
+late_frame_count = 0 # Number of frames acted on more than one frame duration after they were captured
+last_frame_latency = 0.0 # Capture-to-decision latency (in seconds) of the last frame used by "get_tracking_data"
+
+last_read_sequence = 0 # The sequence number of the detections "get_tracking_data" last used
+tracking_data_is_new = False # True if the last call to "get_tracking_data" used a new frame
+last_tracking_data = (90, "none", False, None) # The last result of "get_tracking_data"
+
+def update_stream_sizes(stream = "main"):
+
+    """
+    Reads the stream sizes needed for coordinate conversion from the camera configuration.
+    Must be called again whenever the camera is reconfigured.
+
+    Arguments:
+        "stream": The stream name the detections are drawn on (default: "main")
+
+    Returns:
+        None
+
+    """
+
+    global stream_sizes
+
+    camera_configuration = picam2.camera_configuration() # Gets the active camera configuration
+
+    isp_output_size = tuple(camera_configuration[stream]["size"]) # Size of the ISP output image
+    sensor_output_size = tuple(camera_configuration["raw"]["size"]) # Size of the image read out from the sensor
+    full_sensor_size = tuple(picam2.camera_properties["PixelArraySize"]) # Size of the full pixel array
+
+    stream_sizes = (isp_output_size, sensor_output_size, full_sensor_size)
+
+def get_coordinate_transform(metadata):
+
+    """
+    Gets the inference-to-ISP transform for a frame, recomputing it only when the ScalerCrop, the ROI or the stream sizes change.
+
+    Arguments:
+        "metadata": The metadata dictionary from the camera
+
+    Returns:
+        "coordinate_transform": A tuple of (scale, lower bound, upper bound, origin, output scale) arrays for (x0, y0, x1, y1)
+
+    """
+
+    global coordinate_transform, coordinate_transform_key
+
+    if stream_sizes is None: # If the stream sizes haven't been read yet:
+        update_stream_sizes()
+
+    scaler_crop = tuple(metadata["ScalerCrop"]) # The crop (x, y, width, height) of the full sensor used for this frame
+
+    roi = getattr(imx500, "config", {}).get("roi") # The network input ROI on the full sensor (if one is set)
+
+    if roi is not None and roi.width > 0 and roi.height > 0:
+        roi = (roi.x, roi.y, roi.width, roi.height)
+
+    else:
+        roi = None
+
+    key = (scaler_crop, roi, stream_sizes)
+
+    if key == coordinate_transform_key: # If nothing changed since the last frame:
+        return coordinate_transform # Return the cached transform
+
+    (isp_width, isp_height), (sensor_width, sensor_height), (full_width, full_height) = stream_sizes
+    crop_x, crop_y, crop_width, crop_height = scaler_crop
+
+    sensor_scale_x = sensor_width / full_width # Full sensor pixels to sensor output pixels
+    sensor_scale_y = sensor_height / full_height
+
+    crop_left, crop_top = crop_x * sensor_scale_x, crop_y * sensor_scale_y # The crop in sensor output pixels
+    crop_right, crop_bottom = (crop_x + crop_width) * sensor_scale_x, (crop_y + crop_height) * sensor_scale_y
+
+    lower_x, lower_y, upper_x, upper_y = crop_left, crop_top, crop_right, crop_bottom
+
+    if roi is not None: # If a ROI is set, the boxes are also bounded to it
+        roi_x, roi_y, roi_width, roi_height = roi
+        lower_x, lower_y = max(lower_x, roi_x * sensor_scale_x), max(lower_y, roi_y * sensor_scale_y)
+        upper_x, upper_y = min(upper_x, (roi_x + roi_width) * sensor_scale_x), min(upper_y, (roi_y + roi_height) * sensor_scale_y)
+
+    output_scale_x = isp_width / (crop_right - crop_left) # Sensor output pixels to ISP output pixels
+    output_scale_y = isp_height / (crop_bottom - crop_top)
+
+    coordinate_transform = (
+        numpy.array([sensor_width, sensor_height, sensor_width, sensor_height], dtype = numpy.float32), # Normalized inference coordinates to sensor output pixels
+        numpy.array([lower_x, lower_y, lower_x, lower_y], dtype = numpy.float32),
+        numpy.array([upper_x, upper_y, upper_x, upper_y], dtype = numpy.float32),
+        numpy.array([crop_left, crop_top, crop_left, crop_top], dtype = numpy.float32),
+        numpy.array([output_scale_x, output_scale_y, output_scale_x, output_scale_y], dtype = numpy.float32)
+    )
+    coordinate_transform_key = key
+
+    return coordinate_transform
+
+def convert_inference_boxes(boxes, metadata):
+
+    """
+    Converts normalized inference boxes into ISP output pixel boxes in one vectorized operation.
+    Matches "imx500.convert_inference_coords", but for all boxes at once.
+
+    Arguments:
+        "boxes": An N x 4 array of normalized (y0, x0, y1, x1) boxes
+        "metadata": The metadata dictionary from the camera
+
+    Returns:
+        "converted_boxes": An N x 4 integer array of (x, y, w, h) boxes in ISP output pixels
+
+    """
+
+    scale, lower, upper, origin, output_scale = get_coordinate_transform(metadata)
+
+    corners = boxes[:, [1, 0, 3, 2]] * scale # Reorders to (x0, y0, x1, y1) and scales to sensor output pixels
+    numpy.clip(corners, lower, upper, out = corners) # Bounds the boxes to the crop (and ROI)
+    corners -= origin # Translates the boxes to the top left corner of the crop
+    corners *= output_scale # Scales the boxes to the ISP output
+
+    corners[:, 2:] -= corners[:, :2] # Turns the bottom right corners into widths and heights
+
+    return corners.astype(numpy.int32)
 
 def parse_detections(metadata):
 
@@ -98,7 +302,7 @@ def parse_detections(metadata):
         "metadata": The metadata dictionary from the camera"
     
     Returns:
-        "last_detections": A list of detection objects
+        "last_detections": A detection batch with every detection above the confidence threshold
 
     """
 
@@ -132,15 +336,19 @@ def parse_detections(metadata):
         if bounding_box_order == "xy": # If bounding box order is "xy":
             boxes = boxes[:, [1, 0, 3, 2]] # Reorder boxes to "yx" format
 
-        boxes = numpy.array_split(boxes, 4, axis = 1) # Split boxes into separate arrays for y0, x0, y1, x1
-        boxes = zip(*boxes) # Unzip the boxes into individual components
+    boxes = numpy.asarray(boxes, dtype = numpy.float32).reshape(-1, 4) # Make sure the boxes form an N x 4 array of (y0, x0, y1, x1)
+    confidence_scores = numpy.asarray(confidence_scores, dtype = numpy.float32).reshape(-1) # Flatten the confidence scores
+    classes = numpy.asarray(classes).reshape(-1).astype(numpy.int32) # Flatten the classes and convert them to integer category indices
+
+    keep = confidence_scores > confidence_threshold # Builds one mask for every box above the confidence threshold
 
-    last_detections = []
+    if drop_ignored_categories: # If irrelevant categories should be dropped:
+        category_roles, _ = get_category_roles()
+        keep &= category_roles[classes] != category_role_ignore # Also masks out every detection that is neither a person nor an obstacle
 
-    for box, confidence_score, category in zip(boxes, confidence_scores, classes): # For every box, confidence score and category:
-        if confidence_score > confidence_threshold: # If the confidence score is larger than the confidence threshold:
-            detection = Detection(box, category, confidence_score, metadata) # Create a detection object
-            last_detections.append(detection) # Add it to "last_detections"
+    converted_boxes = convert_inference_boxes(boxes[keep], metadata) # Converts the kept boxes to ISP output coordinates
+
+    last_detections = DetectionBatch(converted_boxes, classes[keep], confidence_scores[keep])
 
     return last_detections
 
@@ -173,6 +381,95 @@ def get_labels():
 
     return labels
 
+@lru_cache # Caches the results of the function below (so the tables are only built once)
+def get_category_roles():
+
+    """
+    Builds lookup tables from category index to role and obstacle width threshold, based on the labels in intrinsics.
+
+    Arguments:
+        None
+
+    Returns:
+        "category_roles": An array with the role (ignore, person or obstacle) of every category index
+        "category_width_thresholds": An array with the obstacle width threshold of every category index (infinite for non-obstacles)
+
+    """
+
+    labels = intrinsics.labels # Get the labels from intrinsics
+
+    category_roles = numpy.full(len(labels), category_role_ignore, dtype = numpy.int8)
+    category_width_thresholds = numpy.full(len(labels), numpy.inf, dtype = numpy.float32)
+
+    for category, label in enumerate(labels): # Go through "labels" and give every person and obstacle label its role
+
+        if label == person_label:
+            category_roles[category] = category_role_person
+
+        elif label in obstacle_width_thresholds:
+            category_roles[category] = category_role_obstacle
+            category_width_thresholds[category] = obstacle_width_thresholds[label]
+
+    return category_roles, category_width_thresholds
+
+@lru_cache(maxsize = 256) # Caches the results of the function below (labels and status texts repeat from frame to frame)
+def get_text_size(text, font, font_scale, thickness):
+
+    """
+    Gets the size of a text, as "cv2.getTextSize" does.
+
+    Arguments:
+        "text": The text
+        "font": The OpenCV font
+        "font_scale": The font scale
+        "thickness": The line thickness
+
+    Returns:
+        "text_size": The (width, height) of the text
+        "baseline": The baseline offset of the text
+
+    """
+
+    return cv2.getTextSize(text, font, font_scale, thickness)
+
+def blend_label_background(frame, left, top, right, bottom):
+
+    """
+    Blends a filled white rectangle into the frame, working only on the pixels inside the rectangle.
+
+    Arguments:
+        "frame": The frame to draw on
+        "left": The left edge of the rectangle (in pixels)
+        "top": The top edge of the rectangle (in pixels)
+        "right": The right edge of the rectangle (in pixels, inclusive)
+        "bottom": The bottom edge of the rectangle (in pixels, inclusive)
+
+    Returns:
+        None
+
+    """
+
+    global label_background_buffer, label_blend_buffer
+
+    frame_height, frame_width = frame.shape[:2]
+
+    left, top = max(left, 0), max(top, 0) # Bounds the rectangle to the frame
+    right, bottom = min(right + 1, frame_width), min(bottom + 1, frame_height)
+
+    if right <= left or bottom <= top: # If the rectangle is outside of the frame:
+        return
+
+    if label_background_buffer is None or label_background_buffer.shape != frame.shape: # If the scratch buffers don't match the frame yet:
+        label_background_buffer = numpy.zeros_like(frame)
+        label_background_buffer[..., :3] = 255 # White (like a (255, 255, 255) rectangle, any extra channel stays 0)
+        label_blend_buffer = numpy.empty_like(frame)
+
+    region = frame[top:bottom, left:right] # View of the pixels under the rectangle
+    blended = label_blend_buffer[:bottom - top, :right - left]
+
+    cv2.addWeighted(label_background_buffer[:bottom - top, :right - left], 1 - bounding_box_opacity, region, bounding_box_opacity, 0, dst = blended) # Blend the background with the pixels under it
+    region[...] = blended # Writes the result back into the frame
+
 def draw_detections(request, stream = "main"):
 
     """
@@ -198,20 +495,15 @@ def draw_detections(request, stream = "main"):
 
     with MappedArray(request, stream) as mapped: # Map the array for the specified stream
         
-        for detection in detections: # For each detection:
+        for (x, y, width, height), category, confidence in zip(detections.boxes.tolist(), detections.categories.tolist(), detections.confidences.tolist()): # For each detection (as plain Python numbers for OpenCV):
 
-            x, y, width, height = detection.box # Get the bounding box coordinates
+            label = f"{labels[category]} ({confidence:.2f})" # Create the label text with category and confidence
 
-            label = f"{labels[int(detection.category)]} ({detection.confidence:.2f})" # Create the label text with category and confidence
-
-            (text_width, text_height), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1) # Get the size of the text
+            (text_width, text_height), baseline = get_text_size(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1) # Get the size of the text
             text_x = x + 5 # Offset text x-position slightly from the bounding box
             text_y = y + 15 # Offset text y-position slightly from the bounding box
 
-            overlay = mapped.array.copy() # Create a copy of the image array for overlay
-            cv2.rectangle(overlay, (text_x, text_y - text_height), (text_x + text_width, text_y + baseline), (255, 255, 255), cv2.FILLED) # Draw a filled rectangle for the text background
-
-            cv2.addWeighted(overlay, 1 - bounding_box_opacity, mapped.array, bounding_box_opacity, 0, mapped.array) # Blend the overlay with the original image
+            blend_label_background(mapped.array, text_x, text_y - text_height, text_x + text_width, text_y + baseline) # Blend the text background into the image (only inside its rectangle)
             cv2.putText(mapped.array, label, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1) # Draw the label text on the image
             cv2.rectangle(mapped.array, (x, y), (x + width, y + height), (0, 255, 0, 0), thickness = bounding_box_thickness) # Draw the bounding box around the detected object
 
@@ -223,7 +515,7 @@ def draw_detections(request, stream = "main"):
 
         if video_status_text: # If there is a video status text:
             
-            (text_width, _), _ = cv2.getTextSize(video_status_text, video_status_text_font, video_status_text_size, video_status_text_thickness)
+            (text_width, _), _ = get_text_size(video_status_text, video_status_text_font, video_status_text_size, video_status_text_thickness)
 
             text_x = (camera_frame_width - text_width) // 2
             text_y = camera_frame_height - 70
@@ -239,9 +531,24 @@ def draw_detections(request, stream = "main"):
                 cv2.LINE_AA # Anti-aliasing
             )
         
-        if video_recording: # If video recording is enabled:
-            frame_bgr = cv2.cvtColor(mapped.array, cv2.COLOR_RGB2BGR) # Convert the image from RGB to BGR format for OpenCV compatibility
-            video_writer.write(frame_bgr) # Write the frame to the video file if video recording is enabled
+        if video_recorder is not None: # If video recording is enabled:
+            video_recorder.submit(mapped.array) # Queue a copy of the frame (the conversion and encoding happen on the recorder thread)
+
+def trigger_recording_event(event):
+
+    """
+    Saves a video clip around an event (if video recording is in events mode).
+
+    Arguments:
+        "event": A short name for the event, used in the clip file name
+
+    Returns:
+        None
+
+    """
+
+    if video_recorder is not None:
+        video_recorder.trigger_event(event)
 
 def get_arguments():
 
@@ -280,77 +587,198 @@ def get_arguments():
 
     parser.add_argument("--labels", type = str, help = "Path to the labels file") # Adds a command-line argument for labels file path
 
+    parser.add_argument("--latest-only", action = argparse.BooleanOptionalAction, default = True, help = "Drain queued frames and only use the newest one") # Adds a command-line argument for latest-only capture
+
     parser.add_argument("--print-intrinsics", action = "store_true", help = "Print JSON network_intrinsics then exit") # Adds a command-line argument for printing intrinsics
 
     return parser.parse_args()
 
-def update_servo_tracking(x_center_normalized):
+def update_servo_tracking(x_center_normalized, frame_time, lead_time = 0.0):
 
     """
-    Updates the servo tracking position based on the normalized x center position.
+    Updates the servo tracking target based on the normalized x center position. Never waits for the servo to move.
 
     Arguments:
         x_center_normalized (float): The normalized x center position of the detected object.
+        frame_time (float): The time of the frame in seconds.
+        lead_time (float): How far ahead (in seconds) of the person's predicted motion the servo should aim (the frame latency).
 
     Returns:
-        "angle": The calculated servo angle position.
+        "angle": The bearing of the person (90 is straight ahead): the servo angle when the frame was exposed plus the person's angle in the image.
+        "direction": The tracking direction.
 
     """
 
-    global servo_position
+    servo_position = servo_controller.position_at(frame_time) # Where the camera looked when the frame was exposed (the servo may have moved since)
 
-    direction = None
+    target_position, direction = pan_controller.update(x_center_normalized, servo_position, frame_time, lead_time) # Gets the target that turns the camera onto where the person is heading
 
-    target_position = servo_position
+    if target_position is not None and abs(target_position - servo_controller.target) >= pan_controller.settings.change_threshold:
+        servo_controller.set_target(target_position) # Wakes the servo thread (which moves at "servo_service.servo_slew_rate")
 
-    if x_center_normalized > 0.5 + servo_threshold:
+    angle = get_bearing(x_center_normalized, servo_position, camera_horizontal_fov)
 
-        if servo_position > servo_minimum_position:
-            target_position = servo_position - servo_step
-            direction = "left"
+    robot_logger.log(f"Person x: {x_center_normalized:.2f} | Servo pos: {servo_position:.2f} | Bearing: {angle:.1f}° | Direction: {direction}", "servo_tracking")
 
-        else:
-            direction = "limit reached (left)"
+    return angle, direction
 
-    elif x_center_normalized < 0.5 - servo_threshold:
+def capture_loop():
 
-        if servo_position < servo_maximum_position:
-            target_position = servo_position + servo_step
-            direction = "right"
+    """
+    Continuously captures metadata, parses the detections and publishes the newest result into "detection_slot".
 
-        else:
-            direction = "limit reached (right)"
+    Arguments:
+        None
 
-    else: # Else (if the person is roughly in the middle):
-        direction = "centered" # Set direction to "centered"
+    Returns:
+        None
 
-    target_position = max(servo_minimum_position, min(servo_maximum_position, target_position))
+    """
 
-    if abs(target_position - servo_position) >= servo_change_threshold:
+    global detection_slot, capture_error_count
 
-        servo_steps = int(abs(target_position - servo_position) / servo_smooth_speed)
+    sequence = detection_slot[0]
 
-        if target_position > servo_position:
-            direction_sign = 1
+    while capture_running:
 
-        else:
-            direction_sign = -1
+        try:
+            if arguments.latest_only: # If only the newest frame should be used:
+                metadata = capture_latest_metadata()
 
-        for _ in range(servo_steps):
-            servo_position += direction_sign * servo_smooth_speed
-            servo.value = servo_position
-            time.sleep(servo_step_delay)
+            else:
+                metadata = picam2.capture_metadata() # Waits for the next frame
 
-    angle = (servo_position + 1) * 90
+            detections = parse_detections(metadata) # Parses the detections of the frame
 
-    print(f"Person x: {x_center_normalized:.2f} | Servo pos: {servo_position:.2f} | Angle: {angle:.1f}° | Direction: {direction}")
+        except Exception as error: # Keeps the thread alive (a dead capture thread would leave the last result published forever)
+            capture_error_count += 1
+            robot_logger.log(f"Capture failed: {error!r}", "capture_error")
+            time.sleep(capture_error_pause)
+            continue
 
-    return angle, direction
+        sequence += 1
+        detection_slot = (sequence, time.monotonic(), metadata.get("SensorTimestamp", 0), detections) # Publishes the result with a single assignment, so readers never need a lock
+
+def capture_latest_metadata():
+
+    """
+    Captures metadata, draining frames that were already queued for too long, so only the newest frame is kept.
+    A frame the capture had to wait for is the newest one there is, so it is always used, however old its timestamp
+    (readout and the IMX500 output add about a frame of latency on their own). At most "camera_buffer_count" frames are drained.
+
+    Arguments:
+        None
+
+    Returns:
+        "metadata": The metadata dictionary of the newest frame
+
+    """
+
+    global frame_duration, stale_frames_drained
+
+    for _ in range(camera_buffer_count):
+
+        capture_start_time = time.monotonic()
+
+        metadata = picam2.capture_metadata() # Gets the next completed frame (returns at once if frames are queued)
+
+        if "FrameDuration" in metadata:
+            frame_duration = metadata["FrameDuration"] / 1e6 # Frame duration is given in microseconds
+
+        if time.monotonic() - capture_start_time > queued_frame_wait_in_frames * frame_duration: # If the capture waited, no newer frame is queued
+            return metadata
+
+        sensor_timestamp = metadata.get("SensorTimestamp") # Time the frame was captured, on the same clock as "time.monotonic_ns"
+
+        if sensor_timestamp is None: # If the frame has no timestamp, it can't be checked
+            return metadata
+
+        frame_age = (time.monotonic_ns() - sensor_timestamp) / 1e9
+
+        if frame_age <= maximum_frame_age_in_frames * frame_duration: # If the queued frame is fresh enough:
+            return metadata
+
+        stale_frames_drained += 1 # Else drop it and take the next one
+
+    return metadata # Every buffer was drained, so this is the newest frame
+
+def start_capture_thread():
+
+    """
+    Starts the background capture thread (if it isn't already running).
+
+    Arguments:
+        None
+
+    Returns:
+        None
+
+    """
+
+    global capture_thread, capture_running
+
+    if capture_thread is not None and capture_thread.is_alive():
+        return
+
+    capture_running = True
+    capture_thread = threading.Thread(target = capture_loop, name = "capture", daemon = True) # Daemon thread, so it never keeps the program alive
+    capture_thread.start()
+
+def stop_capture_thread():
+
+    """
+    Stops the background capture thread and waits for it to finish.
+
+    Arguments:
+        None
+
+    Returns:
+        None
+
+    """
+
+    global capture_running
+
+    capture_running = False
+
+    if capture_thread is not None:
+        capture_thread.join(timeout = 1)
+
+def get_tracking_data_age():
+
+    """
+    Gets how long ago the capture thread published its newest result.
+
+    Arguments:
+        None
+
+    Returns:
+        The age of the newest result in seconds
+
+    """
+
+    return time.monotonic() - detection_slot[1]
+
+def tracking_data_is_stale():
+
+    """
+    Checks if the capture thread hasn't published a result for too long (for example because the camera stopped delivering frames).
+
+    Arguments:
+        None
+
+    Returns:
+        True if the newest result is older than "maximum_tracking_data_age_in_frames" frame durations, False otherwise
+
+    """
+
+    return get_tracking_data_age() > maximum_tracking_data_age_in_frames * frame_duration
 
 def get_tracking_data():
 
     """
-    Captures detections, tracks the person and checks for obstacles.
+    Reads the newest detections from the capture thread, tracks the person and checks for obstacles.
+    Never waits for the camera: if no new frame has arrived, the previous result is returned and "tracking_data_is_new" is set to False.
 
     Arguments:
         None
@@ -363,44 +791,57 @@ def get_tracking_data():
 
     """
 
-    last_results = parse_detections(picam2.capture_metadata()) # Gets the latest results by calling "parse_detections"
+    global last_read_sequence, tracking_data_is_new, last_tracking_data, last_frame_latency, late_frame_count
+
+    sequence, _, sensor_timestamp, last_results = detection_slot # Gets the latest results published by the capture thread
+
+    tracking_data_is_new = sequence != last_read_sequence
+
+    if not tracking_data_is_new: # If the frame was already used (so the servo doesn't step twice for the same frame):
+        return last_tracking_data
+
+    last_read_sequence = sequence
+
+    if sensor_timestamp: # If the frame has a sensor timestamp, measure how old it is now that it is acted on
+        last_frame_latency = (time.monotonic_ns() - sensor_timestamp) / 1e9
+
+        if last_frame_latency > frame_duration:
+            late_frame_count += 1
 
-    person_detections = []
+    category_roles, category_width_thresholds = get_category_roles() # Gets the lookup tables for the categories
 
-    for detection in last_results:
-        if intrinsics.labels[int(detection.category)] == "person":
-            person_detections.append(detection) # Collect each person detection in a list
+    categories = last_results.categories
+    roles = category_roles[categories] # Looks up the role of every detection at once
+
+    person_indices = numpy.flatnonzero(roles == category_role_person) # Collects the index of each person detection
 
     person_area_normalized = None
     angle, direction = 90, "none"
 
-    if person_detections: # If there are any person detections:
-        person = person_detections[0] # Select the first one
-        x, _, width, height = person.box # Extract its bounding box data
+    if person_indices.size > 0: # If there are any person detections:
+        x, _, width, height = last_results.boxes[person_indices[0]].tolist() # Extracts the bounding box data of the first one
         x_center = x + width / 2 # Find the horizontal center of the detected person (in pixels)
         x_center_normalized = x_center / camera_frame_width # Converts pixel position into normalized value between 0 and 1
-        angle, direction = update_servo_tracking(x_center_normalized) # Updates the servo position by calling "update_servo_tracking" with the normalized x-position
+        frame_time = sensor_timestamp / 1e9 if sensor_timestamp else time.monotonic() # The sensor timestamp is on the monotonic clock
+        angle, direction = update_servo_tracking(x_center_normalized, frame_time, last_frame_latency) # Updates the servo position by calling "update_servo_tracking" with the normalized x-position
         #person_height_normalized = height / camera_frame_height # Calculates the person height relative to the camera frame height
         person_area_normalized = (width * height) / camera_frame_area
 
     else: # Else (if there arent any person detections):
-        print("No person detected.")
+        pan_controller.reset() # Starts the controller over when the person comes back
+        robot_logger.log("No person detected.", "person_detection")
 
-    obstacle_labels = {"chair", "couch", "bed", "bench", "table", "tv", "potted plant","car", "truck", "bottle", "vase", "wall", "refrigerator", "microwave"}
-    obstacle_detected = False
+    box_widths_normalized = last_results.boxes[:, 2] / camera_frame_width
+    obstacle_indices = numpy.flatnonzero(box_widths_normalized > category_width_thresholds[categories]) # Non-obstacles have an infinite threshold, so only wide enough obstacles remain
 
-    for obstacle in last_results:
+    obstacle_detected = obstacle_indices.size > 0
 
-        if intrinsics.labels[int(obstacle.category)] in obstacle_labels:
-            x, _, width, height = obstacle.box
+    if obstacle_detected: # If any obstacle is wider than its threshold:
+        robot_logger.log(f"Obstacle detected: {intrinsics.labels[categories[obstacle_indices[0]]]}", "obstacle")
 
-            if width / camera_frame_width  > obstacle_width_threshold: # If the obstacle box width is larger than the threshold
-                label = intrinsics.labels[int(obstacle.category)]
-                print(f"Obstacle detected: {label}")
-                obstacle_detected = True
-                break
+    last_tracking_data = (angle, direction, obstacle_detected, person_area_normalized)
 
-    return angle, direction, obstacle_detected, person_area_normalized
+    return last_tracking_data
 
 # --- Camera setup ---
 
@@ -415,12 +856,14 @@ picam2 = Picamera2(imx500.camera_num) # Creates a control object for the physica
 
 config = picam2.create_preview_configuration( # Creates a preview configuration with:
     controls = {"FrameRate": intrinsics.inference_rate}, # Frame rate from model intrinsics
-    buffer_count = 12, # 12 frame buffers (which improves the capture pipeline)
+    buffer_count = camera_buffer_count, # 12 frame buffers (which improves the capture pipeline)
     transform = libcamera.Transform(hflip = True, vflip = True) # Horizontal and vertical flipping
 )
 
 picam2.pre_callback = draw_detections # Before each frame is displayed, "draw_detections" is called to overlay bounding boxes and labels
 picam2.start(config, show_preview = True) # Starts the video streaming in a live preview window
+update_stream_sizes() # Reads the stream sizes once for the coordinate conversion
+start_capture_thread() # Starts capturing and parsing detections in the background
 
 if intrinsics.preserve_aspect_ratio:
     imx500.set_auto_aspect_ratio()
@@ -430,14 +873,22 @@ if intrinsics.preserve_aspect_ratio:
 if video_recording:
 
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") # Gets the current timestamp for the video file name
-    video_recording_path = f"/home/garage/Documents/repositories/The-Stalker-Bot/videos/{timestamp}.avi"
 
-    video_writer = cv2.VideoWriter(
-    video_recording_path,
-    cv2.VideoWriter_fourcc(*"XVID"), # Video codec for AVI format
-    video_recording_fps,
-    video_recording_size
-)
+    if video_recording_mode == recording_mode_events: # If only clips around events should be recorded:
+        video_recording_path = video_recording_directory # Each clip gets its own file in the directory
+
+    else:
+        video_recording_path = f"{video_recording_directory}/{timestamp}.avi"
+
+    video_recorder = VideoRecorder(
+        video_recording_path,
+        video_recording_fps,
+        video_recording_size,
+        pool_size = video_recording_pool_size,
+        mode = video_recording_mode,
+        pre_roll_time = video_recording_pre_roll_time,
+        post_roll_time = video_recording_post_roll_time
+    )
 
 if __name__ == "__main__":
 
@@ -452,11 +903,19 @@ if __name__ == "__main__":
 
             if obstacle:
                 print("Obstacle detected!")
+
+            if tracking_data_is_new:
+                print(f"Frame latency: {last_frame_latency * 1000:.1f} ms | Late frames: {late_frame_count} | Drained frames: {stale_frames_drained} | Capture errors: {capture_error_count}")
             
             time.sleep(main_loop_update_speed)
 
     except KeyboardInterrupt:
         print("Stopped by user.")
+        stop_capture_thread()
         picam2.stop()
-        video_writer.release()
+
+        if video_recorder is not None:
+            video_recorder.close()
+            print(f"Encoded frames: {video_recorder.encoded_frames} | Dropped frames: {video_recorder.dropped_frames} | Clips: {video_recorder.clip_count}")
+
         cv2.destroyAllWindows()
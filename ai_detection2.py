@@ -7,7 +7,6 @@ import sys # Imports the sys module, which provides access to system-specific pa
 from functools import lru_cache # Imports the lru_cache decorator from the functools module, which is used to cache the results of function calls
 import cv2 # Imports the OpenCV library for image and video processing
 import numpy # Imports the NumPy library for numerical operations on arrays
-from gpiozero import Servo # Imports the Servo class from the gpiozero module for controlling servo motors
 from servo_diff_calc import servo_diff
 
 import libcamera # Imports the libcamera module, which provides access to the camera framework
@@ -245,7 +244,7 @@ def get_tracking_data():
         person = person_detections[0]
         x, y, w, h = person.box
         x_center = x + w / 2
-        frame_width, frame_height = picam2.stream_configuration("main")["size"]
+        frame_width, frame_height = frame_size
         x_center_normalized = x_center / frame_width
         person_height_norm = h / frame_height  # <--- NEW: normalized height
     else:
@@ -286,6 +285,7 @@ config = picam2.create_preview_configuration(
 
 picam2.pre_callback = draw_detections
 picam2.start(config, show_preview=True)
+frame_size = picam2.stream_configuration("main")["size"]  # read once instead of on every tracking call
 
 if intrinsics.preserve_aspect_ratio:
     imx500.set_auto_aspect_ratio()
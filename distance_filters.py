@@ -0,0 +1,580 @@
+# --- Imports ---
+
+import csv # Imports the csv module, which is used to read recorded distance traces
+import math
+import time
+import argparse # Imports the argparse module, which provides a way to parse command-line arguments
+import numpy # Imports the NumPy library for numerical operations on arrays
+
+# --- Definitions ---
+
+default_sample_rate = 20 # Hz (same as "ultrasonic_sensor.sample_rate")
+default_safe_distance_in_cm = 50 # Distance at or below which the car stops (same as "main.safe_distance_in_cm")
+default_maximum_false_stops_per_minute = 0.5 # The report picks the fastest filter at or below this false-stop rate
+false_stop_margin_in_cm = 10 # A stop only counts as false if the true distance is this much above the safe distance
+false_stop_settle_time = 0.5 # ... and has been for this long (in seconds), so a filter releasing a real stop a little late isn't counted
+max_distance_in_cm = 200 # Reading of an echo that never came back (same as "ultrasonic_sensor.max_distance_in_cm")
+
+mad_to_sigma = 1.4826 # Scales the median absolute deviation to the standard deviation of normally distributed readings
+
+# --- Filters ---
+
+# Every filter has "update(distance, time)", which takes one reading and returns the filtered distance, and "reset()".
+# Filters with a window keep it in a preallocated NumPy ring buffer, so updating never allocates.
+
+class SpikeFilter:
+
+    """
+    Holds the last valid reading while a jump larger than the spike threshold is younger than the timeout (the original "ultrasonic_sensor" filter).
+
+    """
+
+    def __init__(self, spike_threshold = 20, timeout = 0.3):
+
+        """
+        Creates a spike filter.
+
+        Arguments:
+            "spike_threshold": The largest jump (in cm) that is accepted right away
+            "timeout": How long (in seconds) the last valid reading is trusted over a jump
+
+        Returns:
+            None
+
+        """
+
+        self.spike_threshold = spike_threshold
+        self.timeout = timeout
+        self.reset()
+
+    def reset(self):
+
+        """
+        Forgets the previous readings.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.last_valid = None
+        self.last_time = None
+
+    def update(self, distance, time):
+
+        """
+        Filters a reading.
+
+        Arguments:
+            "distance": The reading in cm
+            "time": The time of the reading in seconds
+
+        Returns:
+            The filtered distance in cm
+
+        """
+
+        if self.last_valid is None or abs(distance - self.last_valid) <= self.spike_threshold or time - self.last_time > self.timeout:
+            self.last_valid = distance
+            self.last_time = time
+
+        return self.last_valid
+
+class MedianFilter:
+
+    """
+    Returns the median of the last readings.
+
+    """
+
+    def __init__(self, window = 5):
+
+        """
+        Creates a median filter.
+
+        Arguments:
+            "window": The number of readings the median is taken over
+
+        Returns:
+            None
+
+        """
+
+        self.window = numpy.empty(window)
+        self.reset()
+
+    def reset(self):
+
+        """
+        Forgets the previous readings.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.count = 0
+
+    def update(self, distance, time):
+
+        """
+        Filters a reading.
+
+        Arguments:
+            "distance": The reading in cm
+            "time": The time of the reading in seconds
+
+        Returns:
+            The filtered distance in cm
+
+        """
+
+        self.window[self.count % len(self.window)] = distance
+        self.count += 1
+
+        return float(numpy.median(self.window[:min(self.count, len(self.window))]))
+
+class HampelFilter:
+
+    """
+    Replaces a reading by the median of the last readings if it is further from that median than a number of (robust) standard deviations.
+    Unlike a median filter, readings that aren't outliers pass through without delay.
+
+    """
+
+    def __init__(self, window = 7, threshold = 3.0, minimum_deviation = 1.0):
+
+        """
+        Creates a Hampel filter.
+
+        Arguments:
+            "window": The number of readings (including the new one) the median and the deviation are taken over
+            "threshold": The number of standard deviations from the median beyond which a reading is an outlier
+            "minimum_deviation": The smallest standard deviation (in cm), so the sensor noise floor doesn't turn every change into an outlier
+
+        Returns:
+            None
+
+        """
+
+        self.window = numpy.empty(window)
+        self.deviations = numpy.empty(window)
+        self.threshold = threshold
+        self.minimum_deviation = minimum_deviation
+        self.reset()
+
+    def reset(self):
+
+        """
+        Forgets the previous readings.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.count = 0
+
+    def update(self, distance, time):
+
+        """
+        Filters a reading.
+
+        Arguments:
+            "distance": The reading in cm
+            "time": The time of the reading in seconds
+
+        Returns:
+            The filtered distance in cm
+
+        """
+
+        self.window[self.count % len(self.window)] = distance
+        self.count += 1
+
+        size = min(self.count, len(self.window))
+        readings = self.window[:size]
+        median = numpy.median(readings)
+
+        numpy.subtract(readings, median, out = self.deviations[:size])
+        numpy.abs(self.deviations[:size], out = self.deviations[:size])
+
+        deviation = max(mad_to_sigma * numpy.median(self.deviations[:size]), self.minimum_deviation)
+
+        if abs(distance - median) > self.threshold * deviation:
+            return float(median)
+
+        return distance
+
+class ExponentialMovingAverageFilter:
+
+    """
+    Moves the filtered distance a fixed share of the way towards every reading.
+
+    """
+
+    def __init__(self, smoothing = 0.5):
+
+        """
+        Creates an exponential moving average filter.
+
+        Arguments:
+            "smoothing": The share (0 to 1) of the way towards the new reading (1 means no filtering)
+
+        Returns:
+            None
+
+        """
+
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+
+        """
+        Forgets the previous readings.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.average = None
+
+    def update(self, distance, time):
+
+        """
+        Filters a reading.
+
+        Arguments:
+            "distance": The reading in cm
+            "time": The time of the reading in seconds
+
+        Returns:
+            The filtered distance in cm
+
+        """
+
+        if self.average is None:
+            self.average = distance
+
+        else:
+            self.average += self.smoothing * (distance - self.average)
+
+        return self.average
+
+class KalmanFilter:
+
+    """
+    Estimates the distance with a one-dimensional Kalman filter (the distance is modelled as a random walk).
+
+    """
+
+    def __init__(self, process_noise = 400.0, measurement_noise = 4.0):
+
+        """
+        Creates a Kalman filter.
+
+        Arguments:
+            "process_noise": How much the true distance can change, as a variance per second (cm² / s)
+            "measurement_noise": The variance of a reading (cm²)
+
+        Returns:
+            None
+
+        """
+
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+
+        """
+        Forgets the previous readings.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.estimate = None
+        self.variance = None
+        self.last_time = None
+
+    def update(self, distance, time):
+
+        """
+        Filters a reading.
+
+        Arguments:
+            "distance": The reading in cm
+            "time": The time of the reading in seconds
+
+        Returns:
+            The filtered distance in cm
+
+        """
+
+        if self.estimate is None:
+            self.estimate = distance
+            self.variance = self.measurement_noise
+            self.last_time = time
+            return self.estimate
+
+        self.variance += self.process_noise * max(time - self.last_time, 0.0) # Predicts: the distance may have changed since the last reading
+        self.last_time = time
+
+        gain = self.variance / (self.variance + self.measurement_noise) # Corrects: trusts the reading as much as the prediction is uncertain
+        self.estimate += gain * (distance - self.estimate)
+        self.variance *= 1 - gain
+
+        return self.estimate
+
+def get_default_filters():
+
+    """
+    Creates the filters the benchmark compares.
+
+    Arguments:
+        None
+
+    Returns:
+        A dictionary of filter name: filter
+
+    """
+
+    return {
+        "spike (20 cm, 0.3 s)": SpikeFilter(20, 0.3),
+        "median (3)": MedianFilter(3),
+        "median (5)": MedianFilter(5),
+        "hampel (5, 3σ)": HampelFilter(5, 3.0),
+        "hampel (7, 3σ)": HampelFilter(7, 3.0),
+        "ema (0.3)": ExponentialMovingAverageFilter(0.3),
+        "ema (0.6)": ExponentialMovingAverageFilter(0.6),
+        "kalman (q=400, r=4)": KalmanFilter(400.0, 4.0),
+        "kalman (q=4000, r=4)": KalmanFilter(4000.0, 4.0)
+    }
+
+# --- Traces ---
+
+def create_synthetic_trace(duration = 600, sample_rate = default_sample_rate, noise_in_cm = 1.0, outlier_probability = 0.03, seed = 0):
+
+    """
+    Creates a distance trace with sudden obstacles, slow approaches, sensor noise and outlier echoes.
+
+    Arguments:
+        "duration": The trace length in seconds
+        "sample_rate": The readings per second
+        "noise_in_cm": The standard deviation of the reading noise
+        "outlier_probability": The share of readings that are outliers (a short false echo or a lost echo)
+        "seed": The random seed
+
+    Returns:
+        "times": The reading times in seconds
+        "readings": The readings in cm
+        "true_distances": The true distances in cm
+
+    """
+
+    generator = numpy.random.default_rng(seed)
+
+    times = numpy.arange(0, duration, 1 / sample_rate)
+    true_distances = numpy.full(times.size, 150.0)
+
+    segment_start = 0.0
+
+    while segment_start < duration: # Alternates free stretches with obstacles that either pop up or are approached slowly
+
+        free_time = generator.uniform(3, 8)
+        obstacle_time = generator.uniform(1, 3)
+        obstacle_distance = generator.uniform(15, 45)
+
+        free = (times >= segment_start) & (times < segment_start + free_time)
+        true_distances[free] = generator.uniform(80, 190)
+
+        obstacle = (times >= segment_start + free_time) & (times < segment_start + free_time + obstacle_time)
+
+        if generator.random() < 0.5: # The obstacle appears suddenly (someone steps in front of the car)
+            true_distances[obstacle] = obstacle_distance
+
+        else: # The car drives up to the obstacle
+            obstacle_times = times[obstacle] - (segment_start + free_time)
+            true_distances[obstacle] = numpy.maximum(obstacle_distance, 100 - 60 * obstacle_times)
+
+        segment_start += free_time + obstacle_time
+
+    readings = true_distances + generator.normal(0, noise_in_cm, times.size)
+
+    outliers = generator.random(times.size) < outlier_probability
+    lost_echoes = outliers & (generator.random(times.size) < 0.5)
+    false_echoes = outliers & ~lost_echoes
+
+    readings[lost_echoes] = max_distance_in_cm
+    readings[false_echoes] = generator.uniform(5, 40, false_echoes.sum())
+
+    return times, numpy.clip(readings, 0, max_distance_in_cm), true_distances
+
+def load_recorded_trace(path):
+
+    """
+    Loads a recorded distance trace from a CSV file with "time" and "distance" columns (and optionally "true_distance").
+    Without true distances, a centered median of 9 readings stands in for them.
+
+    Arguments:
+        "path": The path of the CSV file
+
+    Returns:
+        "times": The reading times in seconds
+        "readings": The readings in cm
+        "true_distances": The true (or reference) distances in cm
+
+    """
+
+    with open(path, newline = "") as f:
+        rows = list(csv.DictReader(f))
+
+    times = numpy.array([float(row["time"]) for row in rows])
+    readings = numpy.array([float(row["distance"]) for row in rows])
+
+    if rows and "true_distance" in rows[0]:
+        return times, readings, numpy.array([float(row["true_distance"]) for row in rows])
+
+    padded = numpy.pad(readings, 4, mode = "edge")
+    reference = numpy.median(numpy.lib.stride_tricks.sliding_window_view(padded, 9), axis = 1)
+
+    return times, readings, reference
+
+# --- Benchmark ---
+
+def evaluate_filter(distance_filter, times, readings, true_distances, safe_distance_in_cm = default_safe_distance_in_cm):
+
+    """
+    Runs a filter over a trace and measures its cost, accuracy, stop latency and false stops.
+
+    Arguments:
+        "distance_filter": The filter
+        "times": The reading times in seconds
+        "readings": The readings in cm
+        "true_distances": The true distances in cm
+        "safe_distance_in_cm": The distance at or below which the car stops
+
+    Returns:
+        A dictionary with the cost per reading (µs), the error (cm), the mean and worst stop latency (s), the missed stops and the false stops per minute
+
+    """
+
+    distance_filter.reset()
+    filtered = numpy.empty(readings.size)
+
+    start_time = time.perf_counter()
+
+    for index in range(readings.size):
+        filtered[index] = distance_filter.update(readings[index], times[index])
+
+    cost = (time.perf_counter() - start_time) / readings.size
+
+    true_stop = true_distances <= safe_distance_in_cm
+    filtered_stop = filtered <= safe_distance_in_cm
+
+    # --- Latency: from the true distance dropping to the safe distance until the filtered distance does ---
+
+    latencies = []
+    missed_stops = 0
+
+    for start in numpy.flatnonzero(true_stop[1:] & ~true_stop[:-1]) + 1:
+
+        end = start
+
+        while end < readings.size and true_stop[end] and not filtered_stop[end]:
+            end += 1
+
+        if end < readings.size and true_stop[end]:
+            latencies.append(times[end] - times[start])
+
+        else: # The filter never stopped while the obstacle was there
+            missed_stops += 1
+
+    # --- False stops: the filtered distance drops to the safe distance while the true distance is well above it ---
+
+    unclear_times = numpy.where(true_distances > safe_distance_in_cm + false_stop_margin_in_cm, -math.inf, times)
+    clear = times - numpy.maximum.accumulate(unclear_times) >= false_stop_settle_time # Time since the true distance was last near the safe distance
+
+    false_stop = filtered_stop & clear
+    false_stops = numpy.count_nonzero(false_stop[1:] & ~false_stop[:-1]) + int(false_stop[0])
+
+    minutes = max(times[-1] - times[0], 1e-9) / 60
+
+    return {
+        "cost_in_us": cost * 1e6,
+        "error_in_cm": float(numpy.sqrt(numpy.mean((filtered - true_distances) ** 2))),
+        "mean_latency": float(numpy.mean(latencies)) if latencies else 0.0,
+        "worst_latency": float(numpy.max(latencies)) if latencies else 0.0,
+        "missed_stops": missed_stops,
+        "false_stops_per_minute": false_stops / minutes
+    }
+
+def print_report(results, maximum_false_stops_per_minute):
+
+    """
+    Prints the benchmark results and the fastest-stopping filter within the false-stop budget (that never missed a stop).
+
+    Arguments:
+        "results": A dictionary of filter name: evaluation
+        "maximum_false_stops_per_minute": The false-stop budget
+
+    Returns:
+        None
+
+    """
+
+    print(f"{'filter':<24}{'cost (µs)':>12}{'error (cm)':>12}{'latency (s)':>13}{'worst (s)':>11}{'missed':>8}{'false stops/min':>17}")
+
+    for name, result in results.items():
+        print(f"{name:<24}{result['cost_in_us']:>12.1f}{result['error_in_cm']:>12.2f}{result['mean_latency']:>13.3f}{result['worst_latency']:>11.3f}{result['missed_stops']:>8}{result['false_stops_per_minute']:>17.2f}")
+
+    candidates = [name for name, result in results.items() if result["false_stops_per_minute"] <= maximum_false_stops_per_minute and result["missed_stops"] == 0]
+
+    if candidates:
+        best = min(candidates, key = lambda name: (results[name]["mean_latency"], results[name]["worst_latency"]))
+        print(f"\nLowest latency at or below {maximum_false_stops_per_minute:g} false stops per minute: {best}")
+
+    else:
+        print(f"\nNo filter stays at or below {maximum_false_stops_per_minute:g} false stops per minute without missing a stop")
+
+# --- Execution ---
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trace", type = str, default = None, help = "CSV file with a recorded trace (time, distance and optionally true_distance columns)")
+    parser.add_argument("--duration", type = float, default = 600, help = "Length of the synthetic trace in seconds")
+    parser.add_argument("--seed", type = int, default = 0, help = "Random seed of the synthetic trace")
+    parser.add_argument("--safe-distance", type = float, default = default_safe_distance_in_cm, help = "Distance in cm at or below which the car stops")
+    parser.add_argument("--max-false-stops", type = float, default = default_maximum_false_stops_per_minute, help = "False stops per minute the chosen filter may cause")
+    arguments = parser.parse_args()
+
+    if arguments.trace:
+        times, readings, true_distances = load_recorded_trace(arguments.trace)
+
+    else:
+        times, readings, true_distances = create_synthetic_trace(arguments.duration, seed = arguments.seed)
+
+    results = {name: evaluate_filter(distance_filter, times, readings, true_distances, arguments.safe_distance) for name, distance_filter in get_default_filters().items()}
+
+    print_report(results, arguments.max_false_stops)
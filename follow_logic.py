@@ -0,0 +1,266 @@
+# --- Imports ---
+
+import sys # Imports the sys module, which is used to report a failed check through the exit code
+import math
+import itertools
+from collections import namedtuple # Imports namedtuple, which is used for the light-weight, immutable snapshot, command and state types
+
+# --- Types ---
+
+SensorSnapshot = namedtuple("SensorSnapshot", ["angle", "direction", "obstacle", "person_area", "distance_in_cm", "time", "time_to_collision"], defaults = (math.inf,)) # Everything the follow decision reads, sampled once per tick
+ActuatorCommand = namedtuple("ActuatorCommand", ["drive", "steer", "messages", "throttle"]) # What the follow decision wants the car to do, and what to log (throttle from -1 to 1)
+FollowState = namedtuple("FollowState", ["mode", "mode_start_time"]) # The follow mode and the time it was entered
+FollowSettings = namedtuple("FollowSettings", ["target_minimum_area", "target_maximum_area", "safe_distance_in_cm", "max_angle_offset", "area_hysteresis", "throttle_area_band", "minimum_time_to_collision"], defaults = (0.0, 0.0)) # A throttle area band of 0 drives at full throttle (on/off), a minimum time to collision of 0 only brakes on the safe distance
+
+# --- Definitions ---
+
+mode_avoiding = "avoiding"
+mode_waiting = "waiting"
+mode_approaching = "approaching"
+mode_backing = "backing"
+mode_holding = "holding"
+
+drive_forward = "forward"
+drive_backward = "backward"
+drive_stop = "stop"
+
+steer_left = "left"
+steer_right = "right"
+steer_middle = "middle"
+steer_keep = None # Leaves the steering as it is
+steer_track = "track" # Steers towards the person (only used in the mode table)
+
+drive_throttles = { # Drive: full throttle
+    drive_forward: 1.0,
+    drive_backward: -1.0,
+    drive_stop: 0.0
+}
+
+mode_table = { # Mode: (drive, steering, messages)
+    mode_avoiding: (drive_stop, steer_middle, ("Trying to avoid an obstacle...", "Stopping...")),
+    mode_waiting: (drive_stop, steer_middle, ("No person detected, waiting...",)),
+    mode_approaching: (drive_forward, steer_track, ("Person is too far away, trying to move forward...",)),
+    mode_backing: (drive_backward, steer_middle, ("Person is too close, moving backwards...",)),
+    mode_holding: (drive_stop, steer_keep, ("Distance is OK, stopping...",))
+}
+
+area_band_widening = { # Mode: (minimum area widening, maximum area widening) - the band a mode is in reaches further before the mode is left (hysteresis)
+    mode_approaching: (1, 0),
+    mode_backing: (0, 1)
+}
+
+limit_directions = ("limit reached (left)", "limit reached (right)")
+
+initial_state = FollowState(mode_waiting, 0.0)
+
+commands = {} # Prebuilt commands for every (mode, steering), so "decide" doesn't allocate
+
+for mode, (drive, steer, messages) in mode_table.items():
+
+    if steer == steer_track:
+        for tracked_steer in (steer_left, steer_right, steer_middle, steer_keep):
+            commands[(mode, tracked_steer)] = ActuatorCommand(drive, tracked_steer, messages, drive_throttles[drive])
+
+    else:
+        commands[(mode, steer)] = ActuatorCommand(drive, steer, messages, drive_throttles[drive])
+
+# --- Functions ---
+
+def select_mode(mode, snapshot, settings):
+
+    """
+    Selects the follow mode for a sensor snapshot.
+
+    Arguments:
+        "mode": The current follow mode
+        "snapshot": The sensor snapshot
+        "settings": The follow settings
+
+    Returns:
+        The new follow mode
+
+    """
+
+    if snapshot.obstacle or snapshot.distance_in_cm <= settings.safe_distance_in_cm: # If either the AI camera or the ultrasonic sensor detects an obstacle:
+        return mode_avoiding
+
+    if snapshot.time_to_collision <= settings.minimum_time_to_collision: # If the car closes in on an obstacle too fast to stop in time:
+        return mode_avoiding
+
+    if snapshot.person_area is None:
+        return mode_waiting
+
+    minimum_widening, maximum_widening = area_band_widening.get(mode, (0, 0))
+
+    if snapshot.person_area < settings.target_minimum_area + minimum_widening * settings.area_hysteresis: # Person is too far away
+        return mode_approaching
+
+    if snapshot.person_area > settings.target_maximum_area - maximum_widening * settings.area_hysteresis: # Person is too close
+        return mode_backing
+
+    return mode_holding
+
+def select_tracking_steer(angle, direction, settings):
+
+    """
+    Selects the steering towards the person while approaching.
+
+    Arguments:
+        "angle": The servo angle to the person (90 is straight ahead)
+        "direction": The servo tracking direction
+        "settings": The follow settings
+
+    Returns:
+        The steering ("left", "right", "middle" or None to keep it)
+
+    """
+
+    if direction == "centered":
+
+        if abs(angle - 90) > settings.max_angle_offset:
+            return steer_right if angle < 90 else steer_left
+
+        return steer_middle
+
+    if direction in limit_directions:
+        return steer_right if angle < 90 else steer_left
+
+    return steer_keep
+
+def select_throttle(mode, person_area, settings):
+
+    """
+    Selects a throttle proportional to how far the person is past the edge of the target area band.
+
+    Arguments:
+        "mode": The follow mode (approaching or backing)
+        "person_area": The area the person takes up in the frame
+        "settings": The follow settings
+
+    Returns:
+        The throttle (from 0 to 1 while approaching, from -1 to 0 while backing)
+
+    """
+
+    minimum_widening, maximum_widening = area_band_widening[mode]
+
+    if mode == mode_approaching:
+        area_error = settings.target_minimum_area + minimum_widening * settings.area_hysteresis - person_area
+
+    else:
+        area_error = settings.target_maximum_area - maximum_widening * settings.area_hysteresis - person_area
+
+    return max(-1.0, min(1.0, area_error / settings.throttle_area_band)) # Full throttle once the error reaches the band
+
+def decide(state, snapshot, settings):
+
+    """
+    Decides what the car should do for one tick. Pure: only depends on its arguments and does no I/O.
+
+    Arguments:
+        "state": The follow state
+        "snapshot": The sensor snapshot of this tick
+        "settings": The follow settings
+
+    Returns:
+        "state": The new follow state
+        "command": The actuator command
+
+    """
+
+    mode = select_mode(state.mode, snapshot, settings)
+
+    if mode != state.mode: # If the mode changed, remember when
+        state = FollowState(mode, snapshot.time)
+
+    steer = mode_table[mode][1]
+
+    if steer == steer_track:
+        steer = select_tracking_steer(snapshot.angle, snapshot.direction, settings)
+
+    command = commands[(mode, steer)]
+
+    if settings.throttle_area_band > 0 and mode in area_band_widening: # If the throttle is proportional, scale it by the area error
+        command = command._replace(throttle = select_throttle(mode, snapshot.person_area, settings))
+
+    return state, command
+
+# --- Check ---
+
+def get_original_command(snapshot, settings):
+
+    """
+    Gets the command the original branch logic of the follow loop issued (before "decide"), as a reference for the check below.
+
+    Arguments:
+        "snapshot": The sensor snapshot
+        "settings": The follow settings (the original logic has no hysteresis, throttle band or time to collision)
+
+    Returns:
+        The actuator command
+
+    """
+
+    if snapshot.obstacle or snapshot.distance_in_cm <= settings.safe_distance_in_cm:
+        return ActuatorCommand(drive_stop, steer_middle, ("Trying to avoid an obstacle...", "Stopping..."), 0.0)
+
+    if snapshot.person_area is None:
+        return ActuatorCommand(drive_stop, steer_middle, ("No person detected, waiting...",), 0.0)
+
+    if snapshot.person_area < settings.target_minimum_area:
+
+        steer = steer_keep
+
+        if snapshot.direction == "centered":
+
+            if abs(snapshot.angle - 90) > settings.max_angle_offset:
+                steer = steer_right if snapshot.angle < 90 else steer_left
+
+            else:
+                steer = steer_middle
+
+        elif snapshot.direction in ("limit reached (left)", "limit reached (right)"):
+            steer = steer_right if snapshot.angle < 90 else steer_left
+
+        return ActuatorCommand(drive_forward, steer, ("Person is too far away, trying to move forward...",), 1.0)
+
+    if snapshot.person_area > settings.target_maximum_area:
+        return ActuatorCommand(drive_backward, steer_middle, ("Person is too close, moving backwards...",), -1.0)
+
+    return ActuatorCommand(drive_stop, steer_keep, ("Distance is OK, stopping...",), 0.0)
+
+if __name__ == "__main__":
+
+    # "decide" must issue the same commands as the original branch logic when the later additions are turned off.
+    # The settings in "main" deliberately differ (area hysteresis 0.02 and throttle area band 0.1 change the commands near the band edges).
+
+    settings = FollowSettings(target_minimum_area = 0.35, target_maximum_area = 0.5, safe_distance_in_cm = 50, max_angle_offset = 10, area_hysteresis = 0.0, throttle_area_band = 0.0, minimum_time_to_collision = 0.0)
+
+    table = { # Snapshot field: values every combination of which is checked (including the edges of every band)
+        "obstacle": (False, True),
+        "distance_in_cm": (20, 50, 51, 200),
+        "person_area": (None, 0.1, 0.35, 0.4, 0.5, 0.6),
+        "angle": (60, 80, 85, 90, 95, 100, 120),
+        "direction": ("centered", "left", "right", "limit reached (left)", "limit reached (right)", "none")
+    }
+
+    mismatches = 0
+    cases = 0
+
+    for values in itertools.product(*table.values()):
+
+        snapshot = SensorSnapshot(time = 0.0, **dict(zip(table, values)))
+
+        for mode in mode_table: # The previous mode must not matter without hysteresis
+
+            _, command = decide(FollowState(mode, 0.0), snapshot, settings)
+            expected = get_original_command(snapshot, settings)
+            cases += 1
+
+            if command != expected:
+                mismatches += 1
+                print(f"FAILED | {snapshot} after {mode}: decide gave {command}, the original logic {expected}")
+
+    print(f"{cases - mismatches} of {cases} cases match the original branch logic")
+
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,136 @@
+# --- Imports ---
+
+import time
+
+# --- Definitions ---
+
+default_jitter_bin_edges = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1) # Upper edges (in seconds) of the jitter histogram bins (the last bin holds everything above)
+
+class FixedRateScheduler:
+
+    """
+    Runs a loop at a fixed period on a monotonic clock.
+
+    Each tick is scheduled at a multiple of the period from the first tick, so the rate doesn't drift with the time the loop body takes.
+    A tick that ends after the next deadline is an overrun; deadlines that passed completely are skipped (missed) instead of run back to back.
+
+    """
+
+    def __init__(self, period, clock = time.monotonic, sleep = time.sleep, jitter_bin_edges = default_jitter_bin_edges):
+
+        """
+        Creates a scheduler.
+
+        Arguments:
+            "period": The loop period in seconds
+            "clock": The monotonic clock function (in seconds)
+            "sleep": The sleep function (in seconds)
+            "jitter_bin_edges": The upper edges (in seconds) of the jitter histogram bins
+
+        Returns:
+            None
+
+        """
+
+        self.period = period
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter_bin_edges = jitter_bin_edges
+
+        self.next_tick_time = None # Deadline of the current tick (None before the first tick)
+        self.tick_start_time = None
+
+        self.ticks = 0
+        self.overruns = 0 # Ticks whose body ran past the next deadline
+        self.missed_deadlines = 0 # Deadlines skipped because the loop was more than one period late
+        self.longest_tick = 0.0 # Longest time (in seconds) spent in a tick body
+        self.jitter_histogram = [0] * (len(jitter_bin_edges) + 1) # Counts of tick start delays after their deadlines
+
+    def wait_for_next_tick(self):
+
+        """
+        Waits until the next tick is due. Call this at the start of every loop iteration.
+
+        Arguments:
+            None
+
+        Returns:
+            "tick_start_time": The clock time the tick started
+
+        """
+
+        now = self.clock()
+
+        if self.next_tick_time is None: # If this is the first tick, it starts right away
+            self.next_tick_time = now
+
+        else:
+            self.longest_tick = max(self.longest_tick, now - self.tick_start_time)
+            self.next_tick_time += self.period
+
+            if now < self.next_tick_time: # If there is time left, wait for the deadline
+                self.sleep(self.next_tick_time - now)
+
+            else: # Else the tick overran its period
+                self.overruns += 1
+
+                missed = int((now - self.next_tick_time) // self.period)
+
+                if missed > 0: # If whole periods passed, skip their deadlines
+                    self.missed_deadlines += missed
+                    self.next_tick_time += missed * self.period
+
+        self.tick_start_time = self.clock()
+        self.ticks += 1
+
+        self.record_jitter(self.tick_start_time - self.next_tick_time)
+
+        return self.tick_start_time
+
+    def record_jitter(self, jitter):
+
+        """
+        Adds a tick start delay to the jitter histogram.
+
+        Arguments:
+            "jitter": The delay (in seconds) between the deadline and the start of the tick
+
+        Returns:
+            None
+
+        """
+
+        for index, edge in enumerate(self.jitter_bin_edges):
+            if jitter <= edge:
+                self.jitter_histogram[index] += 1
+                return
+
+        self.jitter_histogram[-1] += 1
+
+    def report(self):
+
+        """
+        Creates a short text report of the scheduling statistics.
+
+        Arguments:
+            None
+
+        Returns:
+            The report text
+
+        """
+
+        bin_texts = []
+
+        for index, count in enumerate(self.jitter_histogram):
+
+            if index < len(self.jitter_bin_edges):
+                bin_texts.append(f"<={self.jitter_bin_edges[index] * 1000:g} ms: {count}")
+
+            else:
+                bin_texts.append(f">{self.jitter_bin_edges[-1] * 1000:g} ms: {count}")
+
+        return (
+            f"Ticks: {self.ticks} | Period: {self.period * 1000:g} ms | Overruns: {self.overruns} | Missed deadlines: {self.missed_deadlines} | "
+            f"Longest tick: {self.longest_tick * 1000:.1f} ms | Jitter: {', '.join(bin_texts)}"
+        )
@@ -3,58 +3,63 @@
 
 import time
 import ai_detection
-from remote_controller import press, unpress, check_button_press, move_backwards_button_pin, move_forward_button_pin, turn_left_button_pin, turn_right_button_pin
-from ultrasonic_sensor import get_distance
+import robot_logger
+from loop_scheduler import FixedRateScheduler
+from follow_logic import SensorSnapshot, FollowSettings, decide, initial_state
+from remote_controller import actuator, set_buttons, set_throttle, is_pressed, press_for, turn_left_button_pin, turn_right_button_pin
+from ultrasonic_sensor import get_distance, get_time_to_collision
 
 # --- General definitions ---
 
 turn_time_per_degree = 0.9 / 90
 
+turn_switch_delay = 0.01 # Time between releasing one turn button and pressing the other (scheduled, so the loop doesn't wait)
+
 target_minimum_area = 0.35
 target_maximum_area = 0.5
 
-safe_distance_in_cm = 50
+safe_distance_in_cm = 50 # Distance at which the car always stops ("minimum_time_to_collision" brakes earlier when closing in fast)
+
+minimum_time_to_collision = 1.0 # Seconds to collision at the current closing speed at which the car brakes (about 80 cm at full speed)
 
 max_angle_offset = 10
 
-follow_loop_update_time = 0.1
+area_hysteresis = 0.02 # How far past the target area band the person must be before approaching or backing stops
 
-# --- Timer definitions ---
+throttle_area_band = 0.1 # Area error at which the car drives at full throttle (smaller errors give a duty-cycled, proportional throttle)
 
-first_timer = 0
-first_timer_off = True
-first_wait_time = 1
+follow_settings = FollowSettings(target_minimum_area, target_maximum_area, safe_distance_in_cm, max_angle_offset, area_hysteresis, throttle_area_band, minimum_time_to_collision)
+
+follow_loop_update_time = 0.1
 
-second_timer = 0
-second_timer_off = True
-second_wait_time = 0.1
+scheduler = FixedRateScheduler(follow_loop_update_time) # Runs the follow loop at a fixed rate and measures overruns and jitter
+
+clock = time.monotonic # Clock used for the sensor snapshot times (the simulator replaces it with simulated time)
 
 # --- Log initialization ---
 
-log_file_path = "robot_log.txt"
+log_file_path = "robot_log.jsonl"
 
-with open(log_file_path, "w") as f:
-    f.write("Robot session started")
+logger = robot_logger.configure(log_file_path) # Writes JSON-lines records from a background thread (and starts the log with "Robot session started"), also for "ai_detection"
 
 # --- Helper functions ---
 
-def print_and_log(message):
+def print_and_log(message, message_class = None):
 
     """
-    Prints a message and writes it to a log file.
+    Prints a message and writes it to the log file (both from the logger's background thread).
+    Repeats of the same message in a class are collapsed into one record with a count and a duration.
 
     Arguments:
         "message":
+        "message_class": The class used for collapsing repeats and console rate limits (default: the message itself)
 
     Returns:
         None
     
     """
 
-    print("\n" + message)
-
-    with open(log_file_path, "a") as f:
-        f.write("\n" + message)
+    logger.log(message, message_class)
 
     ai_detection.video_status_text = message # Update the video status text in the AI detection module
         
@@ -71,8 +76,7 @@ def move_forward():
 
     """
 
-    unpress(move_backwards_button_pin)
-    press(move_forward_button_pin)
+    set_throttle(1)
 
 def move_backwards():
 
@@ -87,8 +91,7 @@ def move_backwards():
         
     """
     
-    unpress(move_forward_button_pin)
-    press(move_backwards_button_pin)
+    set_throttle(-1)
 
 def stop():
 
@@ -103,8 +106,7 @@ def stop():
 
     """
 
-    unpress(move_forward_button_pin)
-    unpress(move_backwards_button_pin)
+    set_throttle(0)
 
 def turn(direction, angle):
 
@@ -122,137 +124,114 @@ def turn(direction, angle):
 
     #if time.time() - first_timer > first_wait_time:
 
-    if direction == "right" and not check_button_press(turn_right_button_pin):
-        unpress(turn_left_button_pin)
-        time.sleep(0.01)
-        press(turn_right_button_pin)
+    if direction == "right" and not is_pressed(turn_right_button_pin): # Only changes the pins if the car isn't turning right already
+        set_buttons({turn_left_button_pin: False})
+        press_for(turn_right_button_pin, None, turn_switch_delay)
 
-    if direction == "left" and not check_button_press(turn_left_button_pin):
-        unpress(turn_right_button_pin)
-        time.sleep(0.01)
-        press(turn_left_button_pin)
+    if direction == "left" and not is_pressed(turn_left_button_pin):
+        set_buttons({turn_right_button_pin: False})
+        press_for(turn_left_button_pin, None, turn_switch_delay)
 
     if direction == "middle":
-        unpress(turn_right_button_pin)
-        unpress(turn_left_button_pin)
+        set_buttons({turn_right_button_pin: False, turn_left_button_pin: False})
         return
 
-    print_and_log(f"Turning {direction}! Servo angle: {angle:.1f} degrees")
+    print_and_log(f"Turning {direction}! Servo angle: {angle:.1f} degrees", "turning")
+
+# --- Main program loop ---
 
-def avoid_obstacle():
+def apply_command(command, angle):
 
     """
-    Avoids an obstacle by stopping.
+    Logs an actuator command and carries it out.
 
     Arguments:
-        None
+        "command": The actuator command from "follow_logic.decide"
+        "angle": The angle to the person
 
     Returns:
         None
-    
+
     """
 
-    print_and_log("Stopping...")
-    stop()
+    print_and_log(" ".join(command.messages), "follow_mode") # One message per tick in one class, so a mode that lasts is collapsed into one summary
 
-# --- Main program loop ---
+    set_throttle(command.throttle) # Full throttle presses the drive button, a fractional one duty cycles it
 
-def follow():
+    if command.steer is not None:
+        turn(command.steer, angle)
 
-    global first_timer, second_timer, first_timer_off, second_timer_off
+def follow_step(state, previous_snapshot):
 
     """
-    Runs the person-following loop.
+    Runs one tick of the person-following loop: reads the sensors, decides and carries out the command.
 
     Arguments:
-        None
+        "state": The follow state
+        "previous_snapshot": The sensor snapshot of the previous tick
 
     Returns:
-        None
-    
+        "state": The new follow state
+        "snapshot": The sensor snapshot of this tick
+
     """
 
-    while True:
+    angle, direction, obstacle, person_area = ai_detection.get_tracking_data() # Gets necessary data from the AI camera
 
-        angle, direction, obstacle, person_area = ai_detection.get_tracking_data() # Gets necessary data from the AI camera
-
-        distance_in_cm = get_distance() # Gets distance to closest obstacle from ultrasonic sensor    
-
-        if obstacle or distance_in_cm <= safe_distance_in_cm: # If either the AI camera or the ultrasonic sensor detects an obstacle:
-            print_and_log("Trying to avoid an obstacle...")
-            turn("middle", angle)
-            avoid_obstacle()
-            continue
-            
-        if person_area is None:
-            print_and_log("No person detected, waiting...")
-            turn("middle", angle)
-            stop()
-            continue
-        
-        print_and_log(f"Person takes up {person_area:.2f} of the total frame size")
+    if ai_detection.tracking_data_is_stale(): # If the camera stopped delivering results, the last person seen can't be trusted
+        print_and_log("Camera data is stale, treating it as no person.", "stale_camera")
+        angle, direction, person_area = 90, "none", None
 
-        if not (person_area < target_minimum_area): # person is not too far away
+    distance_in_cm = get_distance() # Gets distance to closest obstacle from ultrasonic sensor
 
-            # resets the first timer if second timer is within wait time
-            if (time.time() - second_timer < second_wait_time): 
-                first_timer_off = True
+    time_to_collision = get_time_to_collision() # Gets the time until the car reaches the obstacle at the current closing speed
 
-            # turns the second timer on
-            if second_timer_off:
-                second_timer = time.time()
-                second_timer_off = False
+    snapshot = SensorSnapshot(angle, direction, obstacle, person_area, distance_in_cm, clock(), time_to_collision)
 
-        if person_area < target_minimum_area:
+    distance_is_unsafe = distance_in_cm <= follow_settings.safe_distance_in_cm or time_to_collision <= follow_settings.minimum_time_to_collision
 
-            # resets the second timer when person is too far away
-            second_timer_off = True
+    # saves a video clip when an event starts
+    if obstacle and not previous_snapshot.obstacle:
+        ai_detection.trigger_recording_event("obstacle")
 
-            # turns the first timer on
-            if first_timer_off:
-                first_timer = time.time()
-                first_timer_off = False
+    if distance_is_unsafe and not (previous_snapshot.distance_in_cm <= follow_settings.safe_distance_in_cm or previous_snapshot.time_to_collision <= follow_settings.minimum_time_to_collision):
+        ai_detection.trigger_recording_event("ultrasonic")
 
-                        
-            print_and_log("Person is too far away, trying to move forward...")
+    if person_area is None and previous_snapshot.person_area is not None:
+        ai_detection.trigger_recording_event("person_lost")
 
-            move_forward()
+    if person_area is not None and not (obstacle or distance_is_unsafe):
+        print_and_log(f"Person takes up {person_area:.2f} of the total frame size", "person_area")
 
-            if direction == "centered":
+    state, command = decide(state, snapshot, follow_settings)
 
-                if abs(angle - 90) > max_angle_offset:
+    apply_command(command, angle)
 
-                    if angle < 90:
-                        turn("right", angle)
-                    
-                    else:
-                        turn("left", angle)
-                    
-                    continue
-                
-                else:
-                    turn("middle", angle)
-            
-            elif direction in ("limit reached (left)", "limit reached (right)"):
+    return state, snapshot
 
-                if angle < 90:
-                    turn("right", angle)
-                    
-                else:
-                    turn("left", angle)
+def follow():
 
-                continue
+    """
+    Runs the person-following loop.
+
+    Arguments:
+        None
+
+    Returns:
+        None
+    
+    """
+
+    state = initial_state
+    snapshot = SensorSnapshot(90, "none", False, None, float("inf"), 0.0)
+
+    while True:
 
-        elif person_area > target_maximum_area:
-            print_and_log("Person is too close, moving backwards...")
-            turn("middle", angle)
-            move_backwards()
+        scheduler.wait_for_next_tick() # Waits for the next tick
 
-        else:
-            print_and_log("Distance is OK, stopping...")
-            stop()
+        logger.next_iteration() # Gives the log records of this iteration a new ID
 
-        time.sleep(follow_loop_update_time)
+        state, snapshot = follow_step(state, snapshot)
 
 # --- Execution ---
 
@@ -263,3 +242,6 @@ if __name__ == "__main__":
 
     except KeyboardInterrupt:
         stop()
+        print_and_log(scheduler.report())
+        print_and_log(actuator.report()) # Shows how many GPIO claims were skipped because the pins were already in the commanded state
+        logger.close()
@@ -4,7 +4,7 @@
 
 import time
 import ai_detection
-from remote_controller import press, unpress, button_pins
+from remote_controller import press, unpress, press_for, button_pins
 from ultrasonic_sensor import get_distance
 
 # --- Definitions ---
@@ -81,14 +81,10 @@ def turn(direction, angle):
     turn_time = abs(angle - 90) * turn_time_per_degree # Sets the turning time by multiplying the angle by "turn_time_per_degree"
 
     if direction == "right":
-        press(17)
-        time.sleep(turn_time)
-        unpress(17)
+        press_for(17, turn_time) # Releases the button after "turn_time" without blocking the loop
         
     if direction == "left":
-        press(27)
-        time.sleep(turn_time)
-        unpress(27)
+        press_for(27, turn_time)
         
     print(f"\nTurned {direction} for {turn_time:.2f}s (angle was {angle:.1f})")
 
@@ -147,30 +143,29 @@ def follow():
 
         elif person_height > target_maximum_height:
             print("\nPerson is too close...")
-            move_backwards()
-            time.sleep(0.5)
-            stop()
+            unpress(22) # Releases forward first (it may still be held from a "too far" tick), so forward and backwards are never pressed together
+            press_for(25, 0.5) # Moves backwards for 0.5 s without blocking the loop
 
         else:
             print("\nDistance is OK...")
 
         if direction == "centered" and person_height <= target_maximum_height:
 
-                if abs(angle - 90) > max_angle_offset:
-
-                    if angle < 90:
-                        turn("right", angle)
-                    
-                    else:
-                        turn("left", angle)
-            
-            elif direction in ("limit reached (left)", "limit reached (right)"):
+            if abs(angle - 90) > max_angle_offset:
 
                 if angle < 90:
                     turn("right", angle)
-                    
+                
                 else:
                     turn("left", angle)
+        
+        elif direction in ("limit reached (left)", "limit reached (right)"):
+
+            if angle < 90:
+                turn("right", angle)
+                
+            else:
+                turn("left", angle)
 
         time.sleep(follow_loop_update_time)
 
@@ -0,0 +1,240 @@
+# --- Imports ---
+
+import json # Imports the json module, which is used to load the gains from a config file
+import os
+from collections import deque, namedtuple
+
+# --- Types ---
+
+PanSettings = namedtuple("PanSettings", [
+    "proportional_gain", # Share of the pointing error corrected per frame (1 turns the camera straight to the person)
+    "integral_gain", # Correction per second of accumulated pointing error (removes the lag behind a walking person)
+    "derivative_gain", # Correction per change of the person's bearing per second (damps overshoot without kicking when the servo moves)
+    "deadband", # Offset of the person from the image center (normalized, 0 to 0.5) within which the servo holds still
+    "deadband_hysteresis", # How much further the person must move out before the servo moves again
+    "integral_limit", # Largest accumulated pointing error (in servo position units times seconds), so the integral can't wind up
+    "change_threshold", # Smallest target change (in servo position units) that is sent to the servo
+    "feedforward_gain", # Share of the predicted person motion over the lead time that is added to the target (0 turns the feedforward off)
+    "velocity_window", # Number of recent detections the person's angular velocity is fitted over
+    "maximum_lead_time", # Longest time (in seconds) the target leads the person by, however late the frame is
+    "centered_band" # Offset of the person from the image center (normalized, 0 to 0.5) within which the direction is "centered", so the car steers on the bearing (separate from the servo deadband)
+])
+
+# --- Definitions ---
+
+default_pan_settings = PanSettings(
+    proportional_gain = 0.8,
+    integral_gain = 0.3,
+    derivative_gain = 0.02,
+    deadband = 0.05,
+    deadband_hysteresis = 0.03,
+    integral_limit = 0.5,
+    change_threshold = 0.005,
+    feedforward_gain = 1.0,
+    velocity_window = 4,
+    maximum_lead_time = 0.3,
+    centered_band = 0.2
+)
+
+servo_range_in_degrees = 180 # Degrees between servo positions -1 and 1
+
+# --- Functions ---
+
+def load_pan_settings(path, defaults = default_pan_settings):
+
+    """
+    Loads pan controller settings from a JSON file. Settings that aren't in the file keep their default value.
+
+    Arguments:
+        "path": The path of the JSON file (an object with any of the "PanSettings" names)
+        "defaults": The settings used when the file or a setting is missing
+
+    Returns:
+        The pan controller settings
+
+    """
+
+    if path is None or not os.path.exists(path):
+        return defaults
+
+    with open(path) as f:
+        values = json.load(f)
+
+    unknown_names = set(values) - set(PanSettings._fields)
+
+    if unknown_names:
+        raise ValueError(f"Unknown pan controller settings in {path}: {', '.join(sorted(unknown_names))}")
+
+    return defaults._replace(**values)
+
+def get_bearing(x_center_normalized, position, horizontal_fov):
+
+    """
+    Gets the bearing of the person relative to the car: where the camera looked plus where the person is in the image.
+
+    Arguments:
+        "x_center_normalized": The normalized x center position of the person (0 to 1)
+        "position": The servo position the frame was seen from
+        "horizontal_fov": The horizontal field of view of the camera in degrees
+
+    Returns:
+        The bearing in degrees (90 is straight ahead, like the servo angle)
+
+    """
+
+    return (position + 1) * (servo_range_in_degrees / 2) + (0.5 - x_center_normalized) * horizontal_fov
+
+# --- Controller ---
+
+class PanController:
+
+    """
+    Turns the camera servo towards the person with a PID controller.
+
+    The pointing error is the person's angle from the image center, in servo position units, so a proportional gain of 1
+    moves the servo target onto the person in one frame. The servo holds still while the person is inside the deadband,
+    and only moves again once the person is further out than the deadband plus the hysteresis.
+    The integral stops accumulating while the target is at a servo limit or the servo is locked, and is clamped (anti-windup).
+    The derivative is taken on the person's bearing rather than on the error, as the error also jumps whenever the servo itself moves (derivative kick).
+
+    The direction is "centered" whenever the person is within the centered band of the image center, even while the servo still moves
+    (the follow loop only steers on "centered" and limit directions, and keeps its steering for "left" and "right").
+
+    A walking person would always be ahead of a target that only reacts to the last frame, so the controller also fits the person's
+    angular velocity over the recent detections and leads the target by the pipeline latency (velocity feedforward).
+
+    """
+
+    def __init__(self, settings = default_pan_settings, horizontal_fov = 66, minimum_position = -1, maximum_position = 1):
+
+        """
+        Creates a pan controller.
+
+        Arguments:
+            "settings": The pan controller settings
+            "horizontal_fov": The horizontal field of view of the camera in degrees
+            "minimum_position": The lowest servo position
+            "maximum_position": The highest servo position
+
+        Returns:
+            None
+
+        """
+
+        self.settings = settings
+        self.horizontal_fov = horizontal_fov
+        self.minimum_position = minimum_position
+        self.maximum_position = maximum_position
+
+        self.locked = False # True while the person is inside the deadband
+        self.integral = 0.0
+        self.last_bearing = None
+        self.last_time = None
+        self.bearings = deque(maxlen = settings.velocity_window) # Recent (time, person bearing in servo position units) pairs
+
+    def reset(self):
+
+        """
+        Forgets the integral and the last bearing (for example when the person is lost).
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.locked = False
+        self.integral = 0.0
+        self.last_bearing = None
+        self.last_time = None
+        self.bearings.clear()
+
+    def get_angular_velocity(self):
+
+        """
+        Fits the person's angular velocity over the recent detections (least squares, so a single noisy box doesn't dominate).
+
+        Arguments:
+            None
+
+        Returns:
+            The angular velocity in servo position units per second (0 if there aren't enough detections)
+
+        """
+
+        if len(self.bearings) < 2:
+            return 0.0
+
+        mean_time = sum(time for time, _ in self.bearings) / len(self.bearings)
+        mean_bearing = sum(bearing for _, bearing in self.bearings) / len(self.bearings)
+
+        time_variance = sum((time - mean_time) ** 2 for time, _ in self.bearings)
+
+        if time_variance == 0:
+            return 0.0
+
+        return sum((time - mean_time) * (bearing - mean_bearing) for time, bearing in self.bearings) / time_variance
+
+    def update(self, x_center_normalized, position, time, lead_time = 0.0):
+
+        """
+        Computes the servo target for a new frame.
+
+        Arguments:
+            "x_center_normalized": The normalized x center position of the person (0 to 1)
+            "position": The servo position the frame was seen from
+            "time": The time of the frame in seconds
+            "lead_time": How far ahead (in seconds) the target should aim, usually the measured latency of the frame
+
+        Returns:
+            "target_position": The new servo target (None to leave the target as it is)
+            "direction": The tracking direction ("left", "right", "centered", "limit reached (left)" or "limit reached (right)")
+
+        """
+
+        settings = self.settings
+
+        offset = 0.5 - x_center_normalized # Positive if the person is on the side the servo reaches by increasing its position
+        error = offset * self.horizontal_fov / (servo_range_in_degrees / 2) # The person's angle from the image center, in servo position units
+
+        bearing = position + error # The person's bearing doesn't depend on where the camera looked
+
+        time_step = time - self.last_time if self.last_time is not None else None
+        derivative = (bearing - self.last_bearing) / time_step if time_step else 0.0
+
+        self.last_bearing = bearing
+        self.last_time = time
+
+        self.bearings.append((time, bearing))
+
+        feedforward = settings.feedforward_gain * self.get_angular_velocity() * min(lead_time, settings.maximum_lead_time) # Where the person will have moved by the time the servo acts
+
+        deadband = settings.deadband if not self.locked else settings.deadband + settings.deadband_hysteresis # Leaving the lock takes a larger offset
+
+        self.locked = abs(offset) <= deadband
+
+        if self.locked:
+            return None, "centered"
+
+        centered = abs(offset) <= settings.centered_band
+
+        output = settings.proportional_gain * error + settings.integral_gain * self.integral + settings.derivative_gain * derivative + feedforward
+        desired_position = position + output
+
+        target_position = max(self.minimum_position, min(self.maximum_position, desired_position))
+
+        if target_position == desired_position and time_step: # Only integrates while the target isn't saturated (anti-windup)
+            self.integral = max(-settings.integral_limit, min(settings.integral_limit, self.integral + error * time_step))
+
+        if target_position != desired_position and abs(position - target_position) < settings.change_threshold: # If the servo already is at the limit it needs to pass:
+            direction = "limit reached (left)" if target_position == self.minimum_position else "limit reached (right)"
+
+        elif centered:
+            direction = "centered"
+
+        else:
+            direction = "left" if target_position < position else "right"
+
+        return target_position, direction
@@ -0,0 +1,216 @@
+# --- Imports ---
+
+import csv # Imports the csv module, which is used to save the result table
+import random
+import argparse # Imports the argparse module, which provides a way to parse command-line arguments
+import itertools
+import multiprocessing # Imports the multiprocessing module, which runs the simulations on every core
+
+import simulator
+from follow_logic import FollowSettings
+from pan_controller import PanSettings, default_pan_settings
+
+# --- Definitions ---
+
+parameter_grid = { # Values tried for every tuning constant ("main" and "pan_controller")
+    "target_minimum_area": [0.25, 0.3, 0.35, 0.4],
+    "target_maximum_area": [0.45, 0.5, 0.6],
+    "safe_distance_in_cm": [30, 50, 70],
+    "max_angle_offset": [5, 10, 20],
+    "proportional_gain": [0.5, 0.8, 1.0],
+    "integral_gain": [0.0, 0.3, 1.0],
+    "deadband": [0.03, 0.05, 0.1],
+    "feedforward_gain": [0.0, 1.0],
+    "throttle_area_band": [0.0, 0.05, 0.1, 0.2],
+    "minimum_time_to_collision": [0.0, 0.7, 1.0, 1.5]
+}
+
+minimum_area_band = 0.05 # Parameter sets whose target area band is narrower than this are skipped
+
+objectives = { # Metric: True if higher is better, False if lower is better
+    "time_on_target": True,
+    "overshoot": False,
+    "toggles_per_minute": False,
+    "collisions_per_minute": False
+}
+
+default_seeds = 3 # Simulated runs (with different person paths) per parameter set
+default_samples = 200 # Parameter sets drawn from the grid (0 for the whole grid)
+
+# --- Functions ---
+
+def get_parameter_sets(samples, seed = 0):
+
+    """
+    Gets the parameter sets to simulate: the whole grid, or a random sample of it.
+
+    Arguments:
+        "samples": The number of parameter sets to draw (0 for the whole grid)
+        "seed": The random seed for drawing the sample
+
+    Returns:
+        A list of parameter dictionaries
+
+    """
+
+    names = list(parameter_grid)
+    parameter_sets = []
+
+    for values in itertools.product(*parameter_grid.values()):
+
+        parameters = dict(zip(names, values))
+
+        if parameters["target_maximum_area"] - parameters["target_minimum_area"] >= minimum_area_band:
+            parameter_sets.append(parameters)
+
+    if samples and samples < len(parameter_sets):
+        parameter_sets = random.Random(seed).sample(parameter_sets, samples)
+
+    return parameter_sets
+
+def evaluate(job):
+
+    """
+    Simulates one parameter set over several seeds and averages the metrics (runs in a worker process).
+
+    Arguments:
+        "job": A (parameters, seeds, duration) tuple
+
+    Returns:
+        A dictionary with the parameters and the averaged metrics
+
+    """
+
+    parameters, seeds, duration = job
+
+    follow_settings = simulator.default_follow_settings()._replace(**{name: value for name, value in parameters.items() if name in FollowSettings._fields})
+
+    pan_settings = default_pan_settings._replace(**{name: value for name, value in parameters.items() if name in PanSettings._fields})
+
+    totals = {}
+
+    for seed in range(seeds):
+
+        metrics = simulator.run_simulation(follow_settings, pan_settings, duration = duration, seed = seed)
+
+        for name, value in metrics.items():
+            totals[name] = totals.get(name, 0) + value
+
+    result = dict(parameters)
+    result.update({name: total / seeds for name, total in totals.items()})
+
+    return result
+
+def dominates(first, second):
+
+    """
+    Checks if a result is at least as good as another in every objective, and better in at least one.
+
+    Arguments:
+        "first": The first result
+        "second": The second result
+
+    Returns:
+        True if "first" dominates "second", False otherwise
+
+    """
+
+    better = False
+
+    for name, higher_is_better in objectives.items():
+
+        difference = first[name] - second[name] if higher_is_better else second[name] - first[name]
+
+        if difference < 0:
+            return False
+
+        if difference > 0:
+            better = True
+
+    return better
+
+def get_pareto_front(results):
+
+    """
+    Gets the results no other result dominates.
+
+    Arguments:
+        "results": A list of results
+
+    Returns:
+        The Pareto-best results, sorted by time on target
+
+    """
+
+    front = [result for result in results if not any(dominates(other, result) for other in results)]
+
+    return sorted(front, key = lambda result: -result["time_on_target"])
+
+def print_table(results, columns):
+
+    """
+    Prints results as an aligned table.
+
+    Arguments:
+        "results": A list of results
+        "columns": The column names
+
+    Returns:
+        None
+
+    """
+
+    print("  ".join(f"{column[:20]:>20}" for column in columns))
+
+    for result in results:
+        print("  ".join(f"{result[column]:>20.4g}" for column in columns))
+
+def run_sweep(samples = default_samples, seeds = default_seeds, duration = simulator.simulation_duration, processes = None):
+
+    """
+    Simulates every parameter set in parallel on all cores.
+
+    Arguments:
+        "samples": The number of parameter sets to draw from the grid (0 for the whole grid)
+        "seeds": The number of simulated runs per parameter set
+        "duration": The simulated seconds per run
+        "processes": The number of worker processes (default: one per core)
+
+    Returns:
+        A list of results (parameters and averaged metrics)
+
+    """
+
+    jobs = [(parameters, seeds, duration) for parameters in get_parameter_sets(samples)]
+
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(evaluate, jobs, chunksize = max(1, len(jobs) // (4 * (processes or multiprocessing.cpu_count()))))
+
+# --- Execution ---
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type = int, default = default_samples, help = "Parameter sets drawn from the grid (0 for the whole grid)")
+    parser.add_argument("--seeds", type = int, default = default_seeds, help = "Simulated runs per parameter set")
+    parser.add_argument("--duration", type = float, default = simulator.simulation_duration, help = "Simulated seconds per run")
+    parser.add_argument("--processes", type = int, default = None, help = "Worker processes (default: one per core)")
+    parser.add_argument("--output", type = str, default = None, help = "Path of a CSV file for the full result table")
+    arguments = parser.parse_args()
+
+    if not simulator.print_check(simulator.check_standing_person()): # The sweep ranks on the simulator, so it has to follow a standing person first
+        raise SystemExit("The simulator fails its standing person check, so its metrics can't be used to rank settings.")
+
+    results = run_sweep(arguments.samples, arguments.seeds, arguments.duration, arguments.processes)
+
+    columns = list(parameter_grid) + list(objectives) + ["heading_error", "reaction_time"]
+
+    if arguments.output:
+
+        with open(arguments.output, "w", newline = "") as f:
+            writer = csv.DictWriter(f, fieldnames = list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+    print(f"\nSimulated {len(results)} parameter sets x {arguments.seeds} runs. Pareto-best parameter sets:\n")
+    print_table(get_pareto_front(results), columns)
@@ -0,0 +1,184 @@
+# --- Imports ---
+
+import sys # Imports the sys module, which is used to report a failed check through the exit code
+import math
+import random
+
+# --- Definitions ---
+
+default_minimum_closing_speed = 5.0 # Closing speed (in cm/s) below which the range counts as steady (the time to collision is infinite)
+default_maximum_range_rate = 200.0 # Fastest the range can change (in cm/s) with the car and the person both moving; faster jumps are a new object, not motion
+default_jump_margin = 5.0 # Noise (in cm) allowed on top of the fastest range change between two readings
+default_maximum_residual = 3.0 # Largest root mean square distance (in cm) of the readings from the fitted line; a worse fit isn't a steady approach
+minimum_readings = 3 # Fewest readings a range rate is fitted over (two readings always fit a line, so a jump couldn't be told apart from motion)
+
+# --- Functions ---
+
+def get_steady_readings(times, distances, maximum_distance = math.inf, maximum_range_rate = default_maximum_range_rate, jump_margin = default_jump_margin):
+
+    """
+    Gets the readings a range rate can be fitted over: no-echo readings are left out, and so is everything before the last jump
+    (an object entering the sensor cone, or the first echo after no-echo readings).
+
+    Arguments:
+        "times": The reading times in seconds, oldest first
+        "distances": The (filtered) distances in cm
+        "maximum_distance": The reading of an echo that never came back (readings at or above it are left out)
+        "maximum_range_rate": The fastest the range can change in cm/s
+        "jump_margin": The noise in cm allowed on top of the fastest range change
+
+    Returns:
+        "times": The reading times since the last jump
+        "distances": The distances since the last jump
+
+    """
+
+    steady_times, steady_distances = [], []
+
+    for time, distance in zip(times, distances):
+
+        if distance >= maximum_distance: # If no echo came back, the reading says nothing about the range
+            continue
+
+        if steady_times and abs(distance - steady_distances[-1]) > maximum_range_rate * (time - steady_times[-1]) + jump_margin: # If the range jumped faster than anything can move, start over
+            steady_times, steady_distances = [], []
+
+        steady_times.append(time)
+        steady_distances.append(distance)
+
+    return steady_times, steady_distances
+
+def estimate_range_rate(times, distances, maximum_distance = math.inf, maximum_residual = default_maximum_residual):
+
+    """
+    Estimates how fast the distance changes, as the least-squares slope over recent readings (so one noisy reading doesn't dominate).
+    Only steady readings are used (see "get_steady_readings"), and a fit the readings stray too far from counts as no motion.
+
+    Arguments:
+        "times": The reading times in seconds, oldest first
+        "distances": The (filtered) distances in cm
+        "maximum_distance": The reading of an echo that never came back (readings at or above it are left out)
+        "maximum_residual": The largest root mean square distance in cm of the readings from the fitted line
+
+    Returns:
+        The range rate in cm/s (negative while closing in), or 0 if there are too few steady readings or they don't lie on a line
+
+    """
+
+    times, distances = get_steady_readings(times, distances, maximum_distance)
+
+    count = len(times)
+
+    if count < minimum_readings:
+        return 0.0
+
+    mean_time = sum(times) / count
+    mean_distance = sum(distances) / count
+
+    time_variance = sum((time - mean_time) ** 2 for time in times)
+
+    if time_variance == 0:
+        return 0.0
+
+    range_rate = sum((time - mean_time) * (distance - mean_distance) for time, distance in zip(times, distances)) / time_variance
+
+    squared_residuals = sum((distance - mean_distance - range_rate * (time - mean_time)) ** 2 for time, distance in zip(times, distances))
+
+    if math.sqrt(squared_residuals / count) > maximum_residual: # If the readings don't lie on a line (a jump the step check let through):
+        return 0.0
+
+    return range_rate
+
+def get_time_to_collision(distance, range_rate, minimum_closing_speed = default_minimum_closing_speed):
+
+    """
+    Gets the time until the distance reaches zero at the current closing speed.
+
+    Arguments:
+        "distance": The current distance in cm
+        "range_rate": The range rate in cm/s (negative while closing in)
+        "minimum_closing_speed": The closing speed in cm/s below which the range counts as steady
+
+    Returns:
+        The time to collision in seconds (infinite if the distance isn't shrinking)
+
+    """
+
+    if -range_rate < minimum_closing_speed:
+        return math.inf
+
+    return max(distance, 0.0) / -range_rate
+
+def get_minimum_time_to_collision(true_distances, sample_rate = 20, window = 0.3, noise_in_cm = 1.0, maximum_distance = 200, seed = 0):
+
+    """
+    Runs the range rate over a simulated distance trace, the way "ultrasonic_sensor" does, and gets the shortest time to collision it reports.
+
+    Arguments:
+        "true_distances": The true distance in cm at every sample
+        "sample_rate": The sample rate in Hz (same as "ultrasonic_sensor.sample_rate")
+        "window": The seconds of samples the range rate is fitted over (same as "ultrasonic_sensor.range_rate_window")
+        "noise_in_cm": The standard deviation of the reading noise
+        "maximum_distance": The reading of an echo that never came back
+        "seed": The random seed of the noise
+
+    Returns:
+        The shortest time to collision in seconds
+
+    """
+
+    noise = random.Random(seed)
+
+    times, readings = [], []
+    shortest = math.inf
+
+    for index, true_distance in enumerate(true_distances):
+
+        time = index / sample_rate
+        reading = true_distance if true_distance >= maximum_distance else min(maximum_distance, true_distance + noise.gauss(0, noise_in_cm))
+
+        times.append(time)
+        readings.append(reading)
+
+        recent_times = [reading_time for reading_time in times if reading_time >= time - window]
+        recent_readings = readings[len(readings) - len(recent_times):]
+
+        shortest = min(shortest, get_time_to_collision(readings[-1], estimate_range_rate(recent_times, recent_readings, maximum_distance)))
+
+    return shortest
+
+# --- Check ---
+
+if __name__ == "__main__":
+
+    brake_time_to_collision = 1.0 # Same as "main.minimum_time_to_collision"
+
+    static_scenarios = { # Name: true distances (2 s at 20 Hz); none of them may brake
+        "no echo, then an object at 160 cm": [200] * 20 + [160] * 20,
+        "no echo, then an object at 150 cm": [200] * 20 + [150] * 20,
+        "no echo, then an object at 60 cm": [200] * 20 + [60] * 20,
+        "wall at 180 cm, then an object at 120 cm": [180] * 20 + [120] * 20,
+        "wall at 100 cm, then an object at 40 cm": [100] * 20 + [40] * 20,
+        "object at 150 cm leaves the cone": [150] * 20 + [200] * 20
+    }
+
+    approach_scenarios = { # Name: true distances; all of them must brake
+        "closing in at 80 cm/s from 150 cm": [150 - 80 * index / 20 for index in range(30)],
+        "no echo, then closing in at 80 cm/s from 150 cm": [200] * 10 + [150 - 80 * index / 20 for index in range(30)]
+    }
+
+    failed = False
+
+    for name, true_distances in static_scenarios.items():
+        shortest = min(get_minimum_time_to_collision(true_distances, seed = seed) for seed in range(20))
+        passed = shortest > brake_time_to_collision
+        failed = failed or not passed
+        print(f"{'ok' if passed else 'FAILED':>6} | {name}: shortest time to collision {shortest:.2f} s (must stay above {brake_time_to_collision} s)")
+
+    for name, true_distances in approach_scenarios.items():
+        shortest = max(get_minimum_time_to_collision(true_distances, seed = seed) for seed in range(20))
+        passed = shortest <= brake_time_to_collision
+        failed = failed or not passed
+        print(f"{'ok' if passed else 'FAILED':>6} | {name}: shortest time to collision {shortest:.2f} s (must reach {brake_time_to_collision} s)")
+
+    sys.exit(1 if failed else 0)
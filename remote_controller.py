@@ -2,6 +2,12 @@
 # --- Imports ---
 
 import lgpio
+import math
+import time
+import heapq # Imports the heapq module, which keeps the timed button changes sorted by their due time
+import itertools
+import threading # Imports the threading module, which is used to time button presses in the background
+from loop_scheduler import FixedRateScheduler
 
 # --- Definitions ---
 
@@ -12,6 +18,135 @@ move_backwards_button_pin = 25
 turn_right_button_pin = 17
 turn_left_button_pin = 27
 
+class ButtonActuator:
+
+    """
+    Tracks the commanded state of the button pins and only reconfigures a pin when its state changes.
+
+    Every press or release is a GPIO claim (a system call that reconfigures the pin), so repeating the state a pin is already in is skipped and counted.
+    Pins are never driven LOW: a release puts the pin back into input mode (high impedance), so presses and releases can't be written as one group claim.
+    "apply" changes several pins at once, releasing before pressing so two buttons of a pair are never pressed together.
+
+    """
+
+    def __init__(self, handle, button_pins):
+
+        """
+        Creates an actuator. All pins start released.
+
+        Arguments:
+            "handle": The handle of the GPIO controller
+            "button_pins": The GPIO pins of the buttons
+
+        Returns:
+            None
+
+        """
+
+        self.handle = handle
+        self.pressed_pins = {button_pin: False for button_pin in button_pins}
+
+        self.gpio_calls = 0 # Claims that changed a pin
+        self.avoided_calls = 0 # Claims skipped because the pin was already in the commanded state
+
+    def press(self, button_pin):
+
+        """
+        Presses a button by driving its GPIO pin HIGH, unless it is already pressed.
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to press
+
+        Returns:
+            None
+
+        """
+
+        if self.pressed_pins[button_pin]:
+            self.avoided_calls += 1
+            return
+
+        lgpio.gpio_claim_output(self.handle, button_pin, 1) # Drive the pin HIGH
+
+        self.pressed_pins[button_pin] = True
+        self.gpio_calls += 1
+
+    def unpress(self, button_pin):
+
+        """
+        Releases a button by setting its GPIO pin to input (high impedance), unless it is already released.
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to release
+
+        Returns:
+            None
+
+        """
+
+        if not self.pressed_pins[button_pin]:
+            self.avoided_calls += 1
+            return
+
+        lgpio.gpio_claim_input(self.handle, button_pin) # Set the pin to input (high impedance)
+
+        self.pressed_pins[button_pin] = False
+        self.gpio_calls += 1
+
+    def apply(self, pin_states):
+
+        """
+        Sets several buttons at once. Releases come before presses.
+
+        Arguments:
+            "pin_states": A dictionary of GPIO pin: True to press or False to release (pins that aren't in it are left as they are)
+
+        Returns:
+            None
+
+        """
+
+        for button_pin, pressed in pin_states.items():
+            if not pressed:
+                self.unpress(button_pin)
+
+        for button_pin, pressed in pin_states.items():
+            if pressed:
+                self.press(button_pin)
+
+    def is_pressed(self, button_pin):
+
+        """
+        Checks if a button is commanded pressed (without reading the pin).
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to check
+
+        Returns:
+            True if the button is pressed, False otherwise
+
+        """
+
+        return self.pressed_pins[button_pin]
+
+    def report(self):
+
+        """
+        Creates a short text report of the GPIO traffic.
+
+        Arguments:
+            None
+
+        Returns:
+            The report text
+
+        """
+
+        total_calls = self.gpio_calls + self.avoided_calls
+        avoided_share = self.avoided_calls / total_calls if total_calls else 0.0
+
+        return f"GPIO claims: {self.gpio_calls} | Avoided: {self.avoided_calls} ({avoided_share:.0%})"
+
 # --- Setup ---
 
 handle = lgpio.gpiochip_open(0) # Opens GPIO controller 0 and returns a handle
@@ -19,12 +154,41 @@ handle = lgpio.gpiochip_open(0) # Opens GPIO controller 0 and returns a handle
 for button_pin in button_pins:
     lgpio.gpio_claim_input(handle, button_pin) # Initializes all pins as inputs
 
+actuator = ButtonActuator(handle, button_pins) # Tracks the pin states, so only changes reach the GPIO controller
+
+# --- Timed presses ---
+
+# lgpio's hardware-timed pulses (tx_pulse) drive the pin LOW between pulses, but a released button must be an input (high impedance),
+# so timed presses run on a timer thread instead. Every pin change (timed or not) happens while holding "timer_condition".
+
+timer_condition = threading.Condition()
+timer_thread = None
+timed_changes = [] # Heap of (due time, sequence, button pin, pressed, pin generation)
+timed_change_sequence = itertools.count() # Keeps changes with the same due time in the order they were scheduled
+pin_generations = {button_pin: 0 for button_pin in button_pins} # Bumped by every new command for a pin, which cancels its older timed changes
+
+# --- Duty cycle ---
+
+# A fractional throttle or steering command presses its button for that fraction of every duty cycle period,
+# so the car's inertia averages the pulses into a proportional speed or turn rate.
+
+duty_cycle_period = 0.2 # Length (in seconds) of one press-and-release cycle
+minimum_pulse_time = 0.02 # Shortest press or release (in seconds) the remote control reacts to
+
+axis_pins = { # Axis: (button pin for positive values, button pin for negative values)
+    "throttle": (move_forward_button_pin, move_backwards_button_pin),
+    "steer": (turn_right_button_pin, turn_left_button_pin)
+}
+
+axis_values = {axis: 0.0 for axis in axis_pins} # Commanded value (-1 to 1) per axis
+modulator_thread = None
+
 # --- Functions ---
 
 def press(button_pin):
 
     """
-    Simulates a button press by driving the GPIO pin HIGH.
+    Simulates a button press by driving the GPIO pin HIGH (only if it isn't pressed already).
     
     Arguments:
         "button_pin": The GPIO pin of the button to press.
@@ -34,12 +198,14 @@ def press(button_pin):
     
     """
 
-    lgpio.gpio_claim_output(handle, button_pin, 1) # Drive the pin HIGH
+    with timer_condition:
+        cancel_timed_changes(button_pin)
+        actuator.press(button_pin)
 
 def unpress(button_pin):
 
     """
-    Simulates a button release by setting the GPIO pin to input (high impedance).
+    Simulates a button release by setting the GPIO pin to input (high impedance) (only if it isn't released already).
     
     Arguments:
         "button_pin": The GPIO pin of the button to release.
@@ -49,7 +215,297 @@ def unpress(button_pin):
     
     """
 
-    lgpio.gpio_claim_input(handle, button_pin) # Set the pin to input (high impedance)
+    with timer_condition:
+        cancel_timed_changes(button_pin)
+        actuator.unpress(button_pin)
+
+def set_buttons(pin_states):
+
+    """
+    Presses and releases several buttons at once (releases first).
+    
+    Arguments:
+        "pin_states": A dictionary of GPIO pin: True to press or False to release.
+        
+    Returns:
+        None
+    
+    """
+
+    with timer_condition:
+
+        for button_pin in pin_states:
+            cancel_timed_changes(button_pin)
+
+        actuator.apply(pin_states)
+
+def press_for(button_pin, duration, delay = 0):
+
+    """
+    Presses a button for a while without blocking (a newer command for the button cancels the rest).
+    
+    Arguments:
+        "button_pin": The GPIO pin of the button to press.
+        "duration": The press duration in seconds (None to keep the button pressed).
+        "delay": The time in seconds before the press starts.
+        
+    Returns:
+        None
+    
+    """
+
+    pulse_train(button_pin, duration, 0, 1, delay)
+
+def pulse_train(button_pin, on_time, off_time, count, delay = 0):
+
+    """
+    Presses a button repeatedly without blocking (a newer command for the button cancels the rest).
+    
+    Arguments:
+        "button_pin": The GPIO pin of the button to press.
+        "on_time": The press duration in seconds (None to keep the button pressed, for a single press).
+        "off_time": The release duration in seconds between presses.
+        "count": The number of presses.
+        "delay": The time in seconds before the first press starts.
+        
+    Returns:
+        None
+    
+    """
+
+    start_time = time.monotonic() + delay
+
+    with timer_condition:
+
+        generation = cancel_timed_changes(button_pin)
+
+        for index in range(count):
+
+            press_time = start_time + index * ((on_time or 0) + off_time)
+
+            if index == 0 and delay <= 0: # Presses right away instead of waiting for the timer thread
+                actuator.press(button_pin)
+
+            else:
+                heapq.heappush(timed_changes, (press_time, next(timed_change_sequence), button_pin, True, generation))
+
+            if on_time is not None:
+                heapq.heappush(timed_changes, (press_time + on_time, next(timed_change_sequence), button_pin, False, generation))
+
+        start_timer_thread()
+
+        timer_condition.notify()
+
+def cancel_timed_changes(button_pin):
+
+    """
+    Cancels the timed changes of a button that haven't happened yet. Must be called while holding "timer_condition".
+    
+    Arguments:
+        "button_pin": The GPIO pin of the button.
+        
+    Returns:
+        The new generation of the pin (timed changes scheduled with it are kept).
+    
+    """
+
+    pin_generations[button_pin] += 1
+
+    return pin_generations[button_pin]
+
+def timer_loop():
+
+    """
+    Carries out the timed button changes when they are due (runs on the timer thread).
+    
+    Arguments:
+        None
+        
+    Returns:
+        None
+    
+    """
+
+    with timer_condition:
+
+        while True:
+
+            if not timed_changes:
+                timer_condition.wait()
+                continue
+
+            due_time, _, button_pin, pressed, generation = timed_changes[0]
+            wait_time = due_time - time.monotonic()
+
+            if wait_time > 0: # Waits for the change to be due (or for a new change to be scheduled)
+                timer_condition.wait(wait_time)
+                continue
+
+            heapq.heappop(timed_changes)
+
+            if generation != pin_generations[button_pin]: # If a newer command for the button cancelled the change
+                continue
+
+            if pressed:
+                actuator.press(button_pin)
+
+            else:
+                actuator.unpress(button_pin)
+
+def start_timer_thread():
+
+    """
+    Starts the timer thread (if it isn't running already).
+    
+    Arguments:
+        None
+        
+    Returns:
+        None
+    
+    """
+
+    global timer_thread
+
+    if timer_thread is None:
+        timer_thread = threading.Thread(target = timer_loop, name = "button-timer", daemon = True)
+        timer_thread.start()
+
+def is_pressed(button_pin):
+
+    """
+    Checks if a button is commanded pressed, without reading the GPIO pin.
+    
+    Arguments:
+        "button_pin": The GPIO pin of the button to check.
+    
+    Returns:
+        True if the button is pressed, False otherwise.
+    
+    """
+
+    return actuator.is_pressed(button_pin)
+
+def set_throttle(throttle):
+
+    """
+    Sets a proportional throttle. Fractional values are duty cycled on the forward or backwards button.
+    
+    Arguments:
+        "throttle": The throttle from -1 (full speed backwards) to 1 (full speed forward).
+        
+    Returns:
+        None
+    
+    """
+
+    set_axis("throttle", throttle)
+
+def set_steer(steer):
+
+    """
+    Sets a proportional steering. Fractional values are duty cycled on the right or left button.
+    
+    Arguments:
+        "steer": The steering from -1 (full left) to 1 (full right).
+        
+    Returns:
+        None
+    
+    """
+
+    set_axis("steer", steer)
+
+def set_axis(axis, value):
+
+    """
+    Sets the value of an axis. Full and zero values are applied right away, fractional ones by the modulator thread.
+    Only zero stops the axis: fractional values are kept between the shortest press and the shortest release the remote control reacts to.
+    
+    Arguments:
+        "axis": The axis ("throttle" or "steer").
+        "value": The value from -1 to 1.
+        
+    Returns:
+        None
+    
+    """
+
+    value = max(-1.0, min(1.0, value))
+
+    on_time = abs(value) * duty_cycle_period
+
+    if 0 < on_time < minimum_pulse_time: # Pulses too short for the remote control are lengthened to the shortest one, so a small command still moves the car
+        value = math.copysign(minimum_pulse_time / duty_cycle_period, value)
+
+    elif duty_cycle_period - on_time < minimum_pulse_time: # Gaps too short for the remote control count as a full press
+        value = math.copysign(1.0, value)
+
+    positive_pin, negative_pin = axis_pins[axis]
+
+    with timer_condition:
+
+        axis_values[axis] = value
+
+        if value in (-1.0, 0.0, 1.0):
+            set_buttons({positive_pin: value > 0, negative_pin: value < 0})
+
+    if value not in (-1.0, 0.0, 1.0):
+        start_modulator_thread()
+
+def modulator_loop():
+
+    """
+    Presses the buttons of the axes with fractional values for their share of every duty cycle period (runs on the modulator thread).
+    
+    Arguments:
+        None
+        
+    Returns:
+        None
+    
+    """
+
+    scheduler = FixedRateScheduler(duty_cycle_period)
+
+    while True:
+
+        scheduler.wait_for_next_tick()
+
+        for axis, value in axis_values.items():
+
+            if value in (-1.0, 0.0, 1.0): # Full and zero values are already applied by "set_axis"
+                continue
+
+            positive_pin, negative_pin = axis_pins[axis]
+            active_pin, other_pin = (positive_pin, negative_pin) if value > 0 else (negative_pin, positive_pin)
+
+            with timer_condition:
+
+                if axis_values[axis] != value: # If the value changed since it was read, "set_axis" already applied it
+                    continue
+
+                unpress(other_pin)
+                press_for(active_pin, abs(value) * duty_cycle_period)
+
+def start_modulator_thread():
+
+    """
+    Starts the modulator thread (if it isn't running already).
+    
+    Arguments:
+        None
+        
+    Returns:
+        None
+    
+    """
+
+    global modulator_thread
+
+    if modulator_thread is None:
+        modulator_thread = threading.Thread(target = modulator_loop, name = "button-modulator", daemon = True)
+        modulator_thread.start()
 
 def check_button_press(button_pin):
 
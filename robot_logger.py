@@ -0,0 +1,386 @@
+# --- Imports ---
+
+import os # Imports the os module, which is used to rotate the log files
+import sys # Imports the sys module, which provides access to the console output
+import json # Imports the json module, which is used to write each record as one JSON line
+import time
+import queue # Imports the queue module, which hands the records over to the writer thread
+import atexit # Imports the atexit module, which is used to flush the log when the program exits
+import datetime # Imports the datetime module for working with dates and times
+import threading # Imports the threading module, which is used to write the log in the background
+
+# --- Definitions ---
+
+default_maximum_file_size = 5 * 1024 * 1024 # Size (in bytes) at which the log file is rotated
+default_backup_count = 3 # Number of rotated log files that are kept
+default_flush_interval = 0.5 # Longest time (in seconds) a record waits before it is written
+default_batch_size = 200 # Largest number of records written at once
+default_coalesce_interval = 10 # Longest time (in seconds) repeats of a message are collapsed before a summary is written
+
+default_console_intervals = { # Shortest time (in seconds) between two console prints of a message class (other classes are not limited)
+    "servo_tracking": 0.5,
+    "person_area": 0.5,
+    "turning": 0.5,
+    "obstacle": 0.5,
+    "follow_mode": 0.5,
+    "person_detection": 0.5
+}
+
+default_logger = None # The logger used by the module-level "log" function
+
+class RobotLogger:
+
+    """
+    Writes log records as JSON lines from a background thread.
+
+    "log" only puts the record in an in-memory queue, so the caller never waits for the file or the console.
+    The writer thread writes the records in batches and rotates the file when it gets too large.
+
+    Every record has a message class (by default the message itself). Repeats of the same message in a class are collapsed:
+    the first one is written, and the repeats are summed up in one record with their count and duration,
+    as soon as the class logs a different message, or once the repeats stop for the coalesce interval.
+    Messages that are logged every tick (like the follow mode) get their own class, so they collapse even when other classes are logged in between.
+    Console prints are also rate limited per message class.
+
+    """
+
+    def __init__(self, path, maximum_file_size = default_maximum_file_size, backup_count = default_backup_count, flush_interval = default_flush_interval, batch_size = default_batch_size, console = True, coalesce_interval = default_coalesce_interval, console_intervals = default_console_intervals):
+
+        """
+        Creates a logger and starts its writer thread. The log file is started over.
+
+        Arguments:
+            "path": The path of the log file (None to only print to the console)
+            "maximum_file_size": The size (in bytes) at which the log file is rotated
+            "backup_count": The number of rotated log files that are kept
+            "flush_interval": The longest time (in seconds) a record waits before it is written
+            "batch_size": The largest number of records written at once
+            "console": Whether the messages are also printed to the console
+            "coalesce_interval": The longest time (in seconds) repeats of a message are collapsed before a summary is written
+            "console_intervals": The shortest time (in seconds) between two console prints, per message class
+
+        Returns:
+            None
+
+        """
+
+        self.path = path
+        self.maximum_file_size = maximum_file_size
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.console = console
+        self.coalesce_interval = coalesce_interval
+        self.console_intervals = console_intervals
+
+        self.loop_iteration = 0 # ID of the current loop iteration, added to every record
+        self.records = queue.SimpleQueue()
+
+        self.repeated_messages = {} # Per message class: [message, first time, last time, repeat count, loop iteration]
+        self.console_times = {} # Per message class: the time of the last console print
+
+        self.file = open(path, "w") if path is not None else None
+
+        self.thread = threading.Thread(target = self.write_loop, name = "robot-logger", daemon = True)
+        self.thread.start()
+
+        atexit.register(self.close) # Makes sure queued records are written when the program exits
+
+        self.log("Robot session started", wall_time = datetime.datetime.now().isoformat()) # The wall time maps the monotonic timestamps to real time
+
+    def next_iteration(self):
+
+        """
+        Starts a new loop iteration, so the following records get its ID.
+
+        Arguments:
+            None
+
+        Returns:
+            "loop_iteration": The ID of the new loop iteration
+
+        """
+
+        self.loop_iteration += 1
+
+        return self.loop_iteration
+
+    def log(self, message, message_class = None, **fields):
+
+        """
+        Queues a log record. Never waits for the file or the console.
+
+        Arguments:
+            "message": The log message
+            "message_class": The class used for collapsing repeats and console rate limits (default: the message itself)
+            "fields": Extra values to store in the record
+
+        Returns:
+            None
+
+        """
+
+        if message_class is None:
+            message_class = message
+
+        self.records.put((time.monotonic(), self.loop_iteration, message, message_class, fields))
+
+    def write_loop(self):
+
+        """
+        Writes queued records in batches until the logger is closed (runs on the writer thread).
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        running = True
+
+        while running:
+
+            try:
+                batch = [self.records.get(timeout = self.flush_interval)] # Waits for the first record of a batch
+
+            except queue.Empty:
+                self.write_lines(self.summarize_repeats(time.monotonic())) # Writes the summaries of repeats that ended a while ago
+                continue
+
+            while len(batch) < self.batch_size: # Collects every other record that is already queued
+
+                try:
+                    batch.append(self.records.get_nowait())
+
+                except queue.Empty:
+                    break
+
+            if None in batch: # A None record means the logger is closing
+                batch = batch[:batch.index(None)]
+                running = False
+
+            self.write_batch(batch)
+            self.write_lines(self.summarize_repeats(time.monotonic())) # Also when the queue is never idle (the follow loop logs every tick)
+
+        self.write_lines(self.summarize_repeats(None)) # Writes the summaries of every repeat that is still open
+
+    def write_batch(self, batch):
+
+        """
+        Writes a batch of records to the log file (and the console), collapsing repeated messages.
+
+        Arguments:
+            "batch": A list of (monotonic time, loop iteration, message, message class, fields) records
+
+        Returns:
+            None
+
+        """
+
+        lines = []
+
+        for monotonic_time, loop_iteration, message, message_class, fields in batch:
+
+            repeated = self.repeated_messages.get(message_class)
+
+            if repeated is not None and repeated[0] == message: # If the message repeats the last one of its class:
+                repeated[2] = monotonic_time
+                repeated[3] += 1
+
+                if monotonic_time - repeated[1] >= self.coalesce_interval: # If it has repeated for long enough, write a summary and start counting again
+                    lines.append(self.summarize_repeat(message_class, repeated))
+                    self.repeated_messages[message_class] = [message, monotonic_time, monotonic_time, 0, loop_iteration]
+
+                continue
+
+            if repeated is not None and repeated[3] > 0: # If the message ends a repeat, write its summary first
+                lines.append(self.summarize_repeat(message_class, repeated))
+
+            self.repeated_messages[message_class] = [message, monotonic_time, monotonic_time, 0, loop_iteration]
+
+            record = {"time": round(monotonic_time, 4), "iteration": loop_iteration, "class": message_class, "message": message}
+            record.update(fields)
+
+            lines.append((message_class, monotonic_time, message, record))
+
+        self.write_lines(lines)
+
+    def summarize_repeat(self, message_class, repeated):
+
+        """
+        Creates the summary line of a repeated message.
+
+        Arguments:
+            "message_class": The message class
+            "repeated": The [message, first time, last time, repeat count, loop iteration] of the repeat
+
+        Returns:
+            A (message class, time, console text, record) line
+
+        """
+
+        message, first_time, last_time, count, loop_iteration = repeated
+        duration = last_time - first_time
+
+        record = {"time": round(last_time, 4), "iteration": loop_iteration, "class": message_class, "message": message, "repeated": count, "duration": round(duration, 3)}
+
+        return (message_class, last_time, f"{message} (repeated {count} times over {duration:.1f} s)", record)
+
+    def summarize_repeats(self, now):
+
+        """
+        Creates the summary lines of open repeats and closes them.
+
+        Arguments:
+            "now": The current monotonic time (only repeats whose last message is older than the coalesce interval are summarized), or None for all repeats
+
+        Returns:
+            A list of (message class, time, console text, record) lines
+
+        """
+
+        lines = []
+
+        for message_class, repeated in self.repeated_messages.items():
+
+            if repeated[3] > 0 and (now is None or now - repeated[2] >= self.coalesce_interval):
+                lines.append(self.summarize_repeat(message_class, repeated))
+                repeated[1] = repeated[2]
+                repeated[3] = 0
+
+        return lines
+
+    def write_lines(self, lines):
+
+        """
+        Writes lines to the log file and prints them to the console (rate limited per message class).
+
+        Arguments:
+            "lines": A list of (message class, time, console text, record) lines
+
+        Returns:
+            None
+
+        """
+
+        if not lines:
+            return
+
+        if self.file is not None:
+            self.file.writelines([json.dumps(record) + "\n" for _, _, _, record in lines])
+            self.file.flush()
+
+        if self.console:
+
+            console_lines = []
+
+            for message_class, monotonic_time, text, _ in lines:
+
+                last_print_time = self.console_times.get(message_class)
+
+                if last_print_time is not None and monotonic_time - last_print_time < self.console_intervals.get(message_class, 0): # If the class was printed too recently:
+                    continue
+
+                self.console_times[message_class] = monotonic_time
+                console_lines.append("\n" + text + "\n")
+
+            sys.stdout.write("".join(console_lines))
+            sys.stdout.flush()
+
+        if self.file is not None and self.file.tell() >= self.maximum_file_size: # If the log file got too large:
+            self.rotate()
+
+    def rotate(self):
+
+        """
+        Rotates the log files ("robot_log.jsonl" becomes "robot_log.jsonl.1" and so on) and starts a new log file.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        self.file.close()
+
+        for index in range(self.backup_count - 1, 0, -1): # Shifts the older log files up by one
+            older_path = f"{self.path}.{index}"
+
+            if os.path.exists(older_path):
+                os.replace(older_path, f"{self.path}.{index + 1}")
+
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+
+        self.file = open(self.path, "w")
+
+    def close(self):
+
+        """
+        Writes every queued record, stops the writer thread and closes the log file.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        if not self.thread.is_alive():
+            return
+
+        self.records.put(None)
+        self.thread.join()
+
+        if self.file is not None:
+            self.file.close()
+
+def configure(path, **options):
+
+    """
+    Creates the logger used by the module-level "log" function.
+
+    Arguments:
+        "path": The path of the log file
+        "options": Other arguments for "RobotLogger"
+
+    Returns:
+        "default_logger": The new logger
+
+    """
+
+    global default_logger
+
+    if default_logger is not None: # Closes a previous logger (for example one that was only printing to the console)
+        default_logger.close()
+
+    default_logger = RobotLogger(path, **options)
+
+    return default_logger
+
+def log(message, message_class = None, **fields):
+
+    """
+    Queues a log record on the logger created by "configure" (a console-only logger is created if there is none).
+
+    Arguments:
+        "message": The log message
+        "message_class": The class used for collapsing repeats and console rate limits (default: the message itself)
+        "fields": Extra values to store in the record
+
+    Returns:
+        None
+
+    """
+
+    global default_logger
+
+    if default_logger is None:
+        default_logger = RobotLogger(None)
+
+    default_logger.log(message, message_class, **fields)
@@ -0,0 +1,180 @@
+# --- Imports ---
+
+import time
+import threading # Imports the threading module, which is used to move the servo in the background
+from collections import deque
+
+# --- Definitions ---
+
+default_slew_rate = 1.0 # Servo speed (in position units per second, the full range is -1 to 1)
+default_update_interval = 0.005 # Time (in seconds) between two servo position updates while moving
+default_history_length = 400 # Number of recorded position changes (2 s of continuous motion at the default update interval)
+
+class ServoController:
+
+    """
+    Moves a servo towards a target position on its own thread, at a limited speed (slew rate).
+
+    "set_target" returns right away, and a new target takes over from the old one at the next position update.
+    "position" is the position the servo was last set to, and can be read at any time.
+    Every position change is recorded with its time, so "position_at" can look up where the servo was when a camera frame was exposed.
+
+    """
+
+    def __init__(self, servo, position = 0.0, slew_rate = default_slew_rate, update_interval = default_update_interval, minimum_position = -1, maximum_position = 1, clock = time.monotonic, history_length = default_history_length):
+
+        """
+        Creates a servo controller, moves the servo to its start position and starts the motion thread.
+
+        Arguments:
+            "servo": The servo (anything with a "value" from -1 to 1, like "gpiozero.Servo")
+            "position": The start position
+            "slew_rate": The servo speed in position units per second
+            "update_interval": The time in seconds between two position updates while moving
+            "minimum_position": The lowest position targets are clamped to
+            "maximum_position": The highest position targets are clamped to
+            "clock": The monotonic clock function (in seconds)
+            "history_length": The number of recorded position changes
+
+        Returns:
+            None
+
+        """
+
+        self.servo = servo
+        self.slew_rate = slew_rate
+        self.update_interval = update_interval
+        self.minimum_position = minimum_position
+        self.maximum_position = maximum_position
+        self.clock = clock
+
+        self.position = position
+        self.target = position
+        self.servo.value = position
+
+        self.history = deque([(clock(), position)], maxlen = history_length) # (time, position) of every position change, oldest first
+
+        self.condition = threading.Condition() # Wakes the motion thread when a new target is set
+        self.running = True
+
+        self.thread = threading.Thread(target = self.motion_loop, name = "servo-controller", daemon = True)
+        self.thread.start()
+
+    def set_target(self, target):
+
+        """
+        Sets the position the servo moves to. Never waits for the servo.
+
+        Arguments:
+            "target": The target position (clamped to the position limits)
+
+        Returns:
+            "target": The clamped target position
+
+        """
+
+        target = max(self.minimum_position, min(self.maximum_position, target))
+
+        with self.condition:
+            self.target = target
+            self.condition.notify()
+
+        return target
+
+    def is_moving(self):
+
+        """
+        Checks if the servo hasn't reached its target yet.
+
+        Arguments:
+            None
+
+        Returns:
+            True if the servo is moving, False otherwise
+
+        """
+
+        return self.position != self.target
+
+    def position_at(self, time):
+
+        """
+        Looks up the position the servo was set to at a given time.
+
+        Arguments:
+            "time": The time on the controller's clock (in seconds)
+
+        Returns:
+            The servo position at that time (the oldest recorded one if the time is older than the history)
+
+        """
+
+        history = tuple(self.history) # Copies the history, so the motion thread can keep appending
+
+        for change_time, position in reversed(history): # Frames are recent, so the search starts from the newest change
+            if change_time <= time:
+                return position
+
+        return history[0][1]
+
+    def motion_loop(self):
+
+        """
+        Moves the servo towards the target at the slew rate until the controller is closed (runs on the motion thread).
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        with self.condition:
+
+            last_update_time = None
+
+            while self.running:
+
+                if self.position == self.target: # If the target is reached, wait for a new one
+                    last_update_time = None
+                    self.condition.wait()
+                    continue
+
+                now = self.clock()
+
+                if last_update_time is None: # If the servo starts moving, it moves one update interval's worth
+                    elapsed = self.update_interval
+
+                else:
+                    elapsed = min(now - last_update_time, 2 * self.update_interval) # Doesn't jump if the thread was held up
+
+                last_update_time = now
+
+                maximum_change = self.slew_rate * elapsed
+                change = max(-maximum_change, min(maximum_change, self.target - self.position))
+
+                self.position = self.target if abs(change) == abs(self.target - self.position) else self.position + change
+                self.servo.value = self.position
+                self.history.append((now, self.position))
+
+                self.condition.wait(self.update_interval) # Waits for the next update (or a new target)
+
+    def close(self):
+
+        """
+        Stops the motion thread (the servo stays where it is).
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+        self.thread.join()
@@ -0,0 +1,147 @@
+# --- Imports ---
+
+import time
+import threading # Imports the threading module, which guards the creation of the shared servo
+from gpiozero import Servo # Imports the Servo class from the gpiozero module for controlling servo motors
+from servo_controller import ServoController # Imports the ServoController class, which moves the servo on its own thread
+
+# --- Servo definitions ---
+
+servo_pin = 18
+servo_maximum_position = 1 # Looking right
+servo_minimum_position = -1 # Looking left
+servo_minimum_pulse_width = 0.5 / 1000
+servo_maximum_pulse_width = 2.5 / 1000
+servo_smooth_speed = 0.005
+servo_step_delay = 0.005
+servo_slew_rate = servo_smooth_speed / servo_step_delay # Servo speed (in position units per second), same as stepping "servo_smooth_speed" every "servo_step_delay"
+
+# --- Shared servo ---
+
+# The only place the servo pin is claimed: every module that moves the camera goes through here,
+# so there is one PWM output, one motion thread and one position.
+
+servo_controller = None
+servo_controller_lock = threading.Lock()
+
+# --- Functions ---
+
+def get_servo_controller():
+
+    """
+    Gets the shared servo controller, creating the servo (centered) on first use.
+
+    Arguments:
+        None
+
+    Returns:
+        The servo controller
+
+    """
+
+    global servo_controller
+
+    with servo_controller_lock:
+
+        if servo_controller is None:
+
+            servo = Servo(servo_pin, min_pulse_width = servo_minimum_pulse_width, max_pulse_width = servo_maximum_pulse_width) # Creates a servo object on GPIO pin 18 with specified pulse widths
+
+            servo_controller = ServoController(
+                servo,
+                position = 0.0,
+                slew_rate = servo_slew_rate,
+                update_interval = servo_step_delay,
+                minimum_position = servo_minimum_position,
+                maximum_position = servo_maximum_position
+            )
+
+    return servo_controller
+
+def set_target(position):
+
+    """
+    Sets the position the servo moves to (a new target takes over right away). Never waits for the servo.
+
+    Arguments:
+        "position": The target position (clamped to the position limits)
+
+    Returns:
+        "target": The clamped target position
+
+    """
+
+    return get_servo_controller().set_target(position)
+
+def get_target():
+
+    """
+    Gets the position the servo is moving to.
+
+    Arguments:
+        None
+
+    Returns:
+        The target position
+
+    """
+
+    return get_servo_controller().target
+
+def get_position():
+
+    """
+    Gets the position the servo is at now.
+
+    Arguments:
+        None
+
+    Returns:
+        The servo position (from -1 to 1)
+
+    """
+
+    return get_servo_controller().position
+
+def get_angle():
+
+    """
+    Gets the angle the servo is at now.
+
+    Arguments:
+        None
+
+    Returns:
+        The servo angle (90 is straight ahead)
+
+    """
+
+    return (get_position() + 1) * 90
+
+def move_to(position, timeout = 3.0):
+
+    """
+    Moves the servo to a position and waits until it gets there (for scans that look around before deciding).
+
+    Arguments:
+        "position": The target position
+        "timeout": The longest time (in seconds) to wait
+
+    Returns:
+        True if the servo reached the position, False if the timeout ran out
+
+    """
+
+    controller = get_servo_controller()
+    controller.set_target(position)
+
+    end_time = time.monotonic() + timeout
+
+    while controller.is_moving():
+
+        if time.monotonic() >= end_time:
+            return False
+
+        time.sleep(controller.update_interval)
+
+    return True
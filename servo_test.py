@@ -7,7 +7,7 @@ import sys # Imports the sys module, which provides access to system-specific pa
 from functools import lru_cache # Imports the lru_cache decorator from the functools module, which is used to cache the results of function calls
 import cv2 # Imports the OpenCV library for image and video processing
 import numpy # Imports the NumPy library for numerical operations on arrays
-from gpiozero import Servo # Imports the Servo class from the gpiozero module for controlling servo motors
+import servo_service # Imports the servo_service module, which owns the camera servo (its pin, position and motion thread)
 
 import libcamera # Imports the libcamera module, which provides access to the camera framework
 from picamera2 import MappedArray, Picamera2 # Imports MappedArray and Picamera2 classes for handling camera data and control with the Picamera2 API
@@ -30,21 +30,11 @@ bounding_box_thickness = 2
 
 # --- Servo definitions ---
 
-servo_maximum_position = 1
-servo_minimum_position = -1
-servo_minimum_pulse_width = 0.5 / 1000
-servo_maximum_pulse_width = 2.5 / 1000
+servo_maximum_position = servo_service.servo_maximum_position
+servo_minimum_position = servo_service.servo_minimum_position
 servo_step = 0.04
 servo_threshold = 0.07
 servo_change_threshold = 0.005
-servo_smooth_speed = 0.005
-servo_step_delay = 0.005
-
-# --- Servo setup ---
-
-servo = Servo(18, min_pulse_width = servo_minimum_pulse_width, max_pulse_width = servo_maximum_pulse_width) # Creates a servo object on GPIO pin 18 with specified pulse widths
-servo_position = 0.0 # Creates a variable for the servo position and initializes its value to 0.0 (center position)
-servo.value = servo_position # Sets the position to "servo_position"
 
 class Detection:
 
@@ -252,7 +242,9 @@ def update_servo_tracking(x_center_normalized):
     Locks the servo (holds the last position) while the person is inside the dead zone.
     """
 
-    global servo_position, servo_locked, servo_locked_position
+    global servo_locked, servo_locked_position
+
+    servo_position = servo_service.get_target() # Steps from the target, so steps still add up while the servo moves
 
     direction = None
     target_position = servo_position
@@ -296,14 +288,9 @@ def update_servo_tracking(x_center_normalized):
 
     # move toward target if difference is meaningful
     if abs(target_position - servo_position) >= servo_change_threshold:
-        # ensure at least one step
-        servo_steps = max(1, int(abs(target_position - servo_position) / servo_smooth_speed))
-        direction_sign = 1 if target_position > servo_position else -1
-        for _ in range(servo_steps):
-            servo_position += direction_sign * servo_smooth_speed
-            servo.value = servo_position
-            time.sleep(servo_step_delay)
+        servo_service.set_target(target_position) # the shared servo moves there in the background
 
+    servo_position = servo_service.get_position()
     angle = (servo_position + 1) * 90
     print(f"Person x: {x_center_normalized:.2f} | Servo pos: {servo_position:.3f} | Angle: {angle:.1f}° | Dir: {direction}")
     return angle, direction
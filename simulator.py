@@ -0,0 +1,1084 @@
+# --- Imports ---
+
+import sys # Imports the sys module, which is used to install the stand-in modules
+import math
+import time
+import types # Imports the types module, which is used to create the stand-in modules
+import random
+import argparse # Imports the argparse module, which provides a way to parse command-line arguments
+from collections import deque, namedtuple
+
+import follow_logic
+from follow_logic import SensorSnapshot
+from pan_controller import PanController, default_pan_settings, get_bearing
+from range_rate import estimate_range_rate, get_time_to_collision as time_to_collision_at
+
+# --- General definitions ---
+
+simulation_tick_time = 0.1 # Seconds of simulated time per follow loop tick (same as "main.follow_loop_update_time")
+simulation_duration = 120 # Seconds of simulated time per run
+
+check_positions = ((2.5, 0.0), (3.0, 1.2), (4.0, -1.5)) # (x, y) in meters where the check places a person standing still in view of the car
+check_duration = 30 # Seconds of simulated time per check run
+check_minimum_time_on_target = 0.7 # Share of the check run the standing person must be on target for (reaching them takes a few seconds)
+
+# --- Car definitions ---
+
+car_forward_speed = 0.8 # m/s while the forward button is pressed
+car_backward_speed = 0.5 # m/s while the backwards button is pressed
+car_turn_rate = 1 / (0.9 / 90) # Degrees per second while a turn button is pressed and the car drives forward at full speed (from "main.turn_time_per_degree"); the car turns less when it drives slower
+car_radius = 0.15 # Meters from the car center to its front
+
+move_forward_button_pin = 22
+move_backwards_button_pin = 25
+turn_right_button_pin = 17
+turn_left_button_pin = 27
+button_pins = [17, 22, 25, 27]
+
+duty_cycle_period = 0.2 # Same as "remote_controller.duty_cycle_period"
+minimum_pulse_time = 0.02 # Same as "remote_controller.minimum_pulse_time"
+
+# --- Person definitions ---
+
+person_speed = 0.7 # m/s while walking
+person_pause_time = 2 # Seconds the person stands still at each waypoint
+person_radius = 0.25 # Meters
+person_height = 1.7 # Meters
+person_area_bounds = (0.5, 6, -3, 3) # (minimum x, maximum x, minimum y, maximum y) of the waypoints, in meters
+
+# --- Camera definitions ---
+
+camera_horizontal_fov = 66 # Degrees
+camera_vertical_fov = 52 # Degrees
+camera_range = 8 # Meters beyond which nothing is detected
+obstacle_width_threshold = 0.25 # Same as "ai_detection.obstacle_width_threshold"
+
+# --- Servo definitions (same as in "ai_detection") ---
+
+servo_maximum_position = 1
+servo_minimum_position = -1
+servo_slew_rate = 1.0 # Position units per second
+
+# --- Ultrasonic sensor definitions ---
+
+ultrasonic_cone_half_angle = 15 # Degrees
+ultrasonic_max_distance_in_cm = 200
+ultrasonic_noise_in_cm = 1 # Standard deviation of the reading noise
+ultrasonic_range_rate_window = 0.3 # Same as "ultrasonic_sensor.range_rate_window"
+
+# --- Obstacle definitions ---
+
+Obstacle = namedtuple("Obstacle", ["x", "y", "radius"])
+
+default_obstacles = (Obstacle(2.5, 1.5, 0.3), Obstacle(-1.5, 2.0, 0.4), Obstacle(1.0, -2.5, 0.3))
+
+# --- Simulation state ---
+
+current_world = None # The world the stand-in modules read from and write to
+
+class SimulatedWorld:
+
+    """
+    Models the car, a walking person, static obstacles, the servo camera and the ultrasonic sensor, and collects the run metrics.
+
+    """
+
+    def __init__(self, follow_settings, pan_settings = default_pan_settings, obstacles = default_obstacles, seed = 0, standing_person = None):
+
+        """
+        Creates a world with the car at the origin facing along x, and the person 2.5 m ahead.
+
+        Arguments:
+            "follow_settings": The follow settings (used for the metrics)
+            "pan_settings": The pan controller settings
+            "obstacles": The static obstacles
+            "seed": The random seed for the person's path and the sensor noise
+            "standing_person": The (x, y) in meters where the person stands still (None for a person walking between random waypoints)
+
+        Returns:
+            None
+
+        """
+
+        self.follow_settings = follow_settings
+        self.pan_controller = PanController(pan_settings, camera_horizontal_fov, servo_minimum_position, servo_maximum_position)
+        self.obstacles = obstacles
+        self.random = random.Random(seed)
+
+        self.time = 0.0
+
+        self.car_x, self.car_y, self.car_heading = 0.0, 0.0, 0.0 # Meters, meters, degrees (counterclockwise, so left is positive)
+
+        self.person_x, self.person_y = 2.5, 0.0
+        self.person_waypoint = self.next_waypoint()
+        self.person_pause_end = 0.0
+
+        if standing_person is not None: # The person waits at their position for the whole run
+            self.person_x, self.person_y = standing_person
+            self.person_waypoint = standing_person
+            self.person_pause_end = math.inf
+
+        self.servo_position = 0.0
+        self.servo_target = 0.0
+
+        self.distance_history = deque() # (time, distance in cm) of the ultrasonic readings within the range rate window, oldest first
+
+        self.pressed_pins = {button_pin: False for button_pin in button_pins}
+        self.timed_changes = [] # (due time, button pin, pressed) changes scheduled by "press_for" and "pulse_train"
+        self.throttle_duty_cycle = 1.0 # Share of the time the drive button is pressed (set by "set_throttle")
+        self.steer_duty_cycle = 1.0 # Share of the time the turn button is pressed (set by "set_steer")
+
+        # --- Metrics ---
+
+        self.ticks = 0
+        self.visible_ticks = 0
+        self.on_target_ticks = 0
+        self.overshoot_ticks = 0
+        self.heading_error_sum = 0.0
+        self.heading_error_ticks = 0
+        self.camera_error_sum = 0.0
+        self.actuator_toggles = 0
+        self.collisions = 0
+        self.in_contact = False
+        self.log_messages = 0
+
+        self.desired_drive = follow_logic.drive_stop
+        self.reaction_start_time = None
+        self.reaction_times = []
+
+    def clock(self):
+
+        """
+        Gets the simulated time (replaces "main.clock").
+
+        Arguments:
+            None
+
+        Returns:
+            The simulated time in seconds
+
+        """
+
+        return self.time
+
+    def next_waypoint(self):
+
+        """
+        Picks a random waypoint for the person.
+
+        Arguments:
+            None
+
+        Returns:
+            The (x, y) of the waypoint in meters
+
+        """
+
+        minimum_x, maximum_x, minimum_y, maximum_y = person_area_bounds
+
+        return (self.random.uniform(minimum_x, maximum_x), self.random.uniform(minimum_y, maximum_y))
+
+    def locate(self, x, y):
+
+        """
+        Locates a point relative to the car.
+
+        Arguments:
+            "x": The x position of the point in meters
+            "y": The y position of the point in meters
+
+        Returns:
+            "distance": The distance from the car center in meters
+            "bearing": The bearing from the car heading in degrees (left is positive)
+
+        """
+
+        dx, dy = x - self.car_x, y - self.car_y
+        bearing = math.degrees(math.atan2(dy, dx)) - self.car_heading
+        bearing = (bearing + 180) % 360 - 180
+
+        return math.hypot(dx, dy), bearing
+
+    def objects(self):
+
+        """
+        Gets every round object in the world: the obstacles and the person.
+
+        Arguments:
+            None
+
+        Returns:
+            A list of (x, y, radius) tuples
+
+        """
+
+        return [(obstacle.x, obstacle.y, obstacle.radius) for obstacle in self.obstacles] + [(self.person_x, self.person_y, person_radius)]
+
+    # --- Physics ---
+
+    def step(self, tick_time):
+
+        """
+        Moves the person and the car forward by one tick.
+
+        Arguments:
+            "tick_time": The tick time in seconds
+
+        Returns:
+            None
+
+        """
+
+        self.time += tick_time
+
+        self.apply_timed_changes()
+
+        self.move_person(tick_time)
+        self.move_car(tick_time)
+        self.move_servo(tick_time)
+
+        self.distance_history.append((self.time, self.get_distance())) # The sampler thread reads the sensor in the background
+
+        while self.distance_history[0][0] < self.time - ultrasonic_range_rate_window:
+            self.distance_history.popleft()
+
+    def move_person(self, tick_time):
+
+        """
+        Walks the person towards the waypoint, pausing at each one.
+
+        Arguments:
+            "tick_time": The tick time in seconds
+
+        Returns:
+            None
+
+        """
+
+        if self.time < self.person_pause_end:
+            return
+
+        waypoint_x, waypoint_y = self.person_waypoint
+        dx, dy = waypoint_x - self.person_x, waypoint_y - self.person_y
+        remaining = math.hypot(dx, dy)
+        walked = person_speed * tick_time
+
+        if walked >= remaining: # If the waypoint is reached, pause and pick the next one
+            self.person_x, self.person_y = waypoint_x, waypoint_y
+            self.person_waypoint = self.next_waypoint()
+            self.person_pause_end = self.time + person_pause_time
+
+        else:
+            self.person_x += dx / remaining * walked
+            self.person_y += dy / remaining * walked
+
+    def move_car(self, tick_time):
+
+        """
+        Drives and steers the car according to the pressed buttons. The car stops at anything it runs into.
+
+        Arguments:
+            "tick_time": The tick time in seconds
+
+        Returns:
+            None
+
+        """
+
+        speed = 0.0
+
+        if self.pressed_pins[move_forward_button_pin] and not self.pressed_pins[move_backwards_button_pin]:
+            speed = car_forward_speed * self.throttle_duty_cycle
+
+        elif self.pressed_pins[move_backwards_button_pin] and not self.pressed_pins[move_forward_button_pin]:
+            speed = -car_backward_speed * self.throttle_duty_cycle
+
+        if speed == 0:
+            return
+
+        steering = (self.pressed_pins[turn_left_button_pin] - self.pressed_pins[turn_right_button_pin]) * self.steer_duty_cycle # 1 for left, -1 for right
+
+        self.car_heading += steering * car_turn_rate * tick_time * speed / car_forward_speed # Steered wheels turn the car by the distance driven (reversing turns the other way)
+
+        heading = math.radians(self.car_heading)
+        new_x = self.car_x + math.cos(heading) * speed * tick_time
+        new_y = self.car_y + math.sin(heading) * speed * tick_time
+
+        in_contact = any(math.hypot(x - new_x, y - new_y) < radius + car_radius for x, y, radius in self.objects())
+
+        if in_contact and not self.in_contact: # Counts every new contact as one collision
+            self.collisions += 1
+
+        self.in_contact = in_contact
+
+        if not in_contact:
+            self.car_x, self.car_y = new_x, new_y
+
+    def move_servo(self, tick_time):
+
+        """
+        Moves the servo towards its target at the slew rate (like "servo_controller.ServoController").
+
+        Arguments:
+            "tick_time": The tick time in seconds
+
+        Returns:
+            None
+
+        """
+
+        maximum_change = servo_slew_rate * tick_time
+
+        self.servo_position += max(-maximum_change, min(maximum_change, self.servo_target - self.servo_position))
+
+    # --- Stand-in for "ai_detection" ---
+
+    def person_view(self):
+
+        """
+        Projects the person into the camera image.
+
+        Arguments:
+            None
+
+        Returns:
+            "visible": True if the person is in the camera view
+            "x_center_normalized": The horizontal center of the person in the image (0 to 1)
+            "person_area_normalized": The area of the person's bounding box relative to the frame
+
+        """
+
+        distance, bearing = self.locate(self.person_x, self.person_y)
+
+        camera_angle = (self.servo_position + 1) * 90 - 90 # Direction the camera looks, relative to the car heading (left is positive)
+        camera_offset = bearing - camera_angle
+
+        width_normalized = min(1.0, 2 * math.degrees(math.atan2(person_radius, distance)) / camera_horizontal_fov)
+        height_normalized = min(1.0, 2 * math.degrees(math.atan2(person_height / 2, distance)) / camera_vertical_fov)
+
+        visible = distance <= camera_range and abs(camera_offset) <= camera_horizontal_fov / 2
+
+        return visible, 0.5 - camera_offset / camera_horizontal_fov, width_normalized * height_normalized
+
+    def update_servo_tracking(self, x_center_normalized):
+
+        """
+        Sets the servo target like "ai_detection.update_servo_tracking" (with the same pan controller).
+
+        Arguments:
+            "x_center_normalized": The normalized x center position of the person
+
+        Returns:
+            "angle": The servo angle
+            "direction": The tracking direction
+
+        """
+
+        target_position, direction = self.pan_controller.update(x_center_normalized, self.servo_position, self.time, simulation_tick_time) # The servo acts on the frame during the next tick
+
+        if target_position is not None and abs(target_position - self.servo_target) >= self.pan_controller.settings.change_threshold:
+            self.servo_target = target_position
+
+        return get_bearing(x_center_normalized, self.servo_position, camera_horizontal_fov), direction
+
+    def get_tracking_data(self):
+
+        """
+        Stands in for "ai_detection.get_tracking_data".
+
+        Arguments:
+            None
+
+        Returns:
+            "angle":
+            "direction":
+            "obstacle":
+            "person_area_normalized":
+
+        """
+
+        visible, x_center_normalized, person_area_normalized = self.person_view()
+
+        angle, direction = 90, "none"
+
+        if visible:
+            angle, direction = self.update_servo_tracking(x_center_normalized)
+
+        else:
+            self.pan_controller.reset()
+            person_area_normalized = None
+
+        camera_angle = (self.servo_position + 1) * 90 - 90
+        obstacle = False
+
+        for obstacle_definition in self.obstacles: # Checks if an obstacle in view is wide enough
+
+            distance, bearing = self.locate(obstacle_definition.x, obstacle_definition.y)
+
+            if distance > camera_range or abs(bearing - camera_angle) > camera_horizontal_fov / 2:
+                continue
+
+            width_normalized = 2 * math.degrees(math.atan2(obstacle_definition.radius, distance)) / camera_horizontal_fov
+
+            if width_normalized > obstacle_width_threshold:
+                obstacle = True
+                break
+
+        return angle, direction, obstacle, person_area_normalized
+
+    # --- Stand-in for "ultrasonic_sensor" ---
+
+    def get_distance(self):
+
+        """
+        Stands in for "ultrasonic_sensor.get_distance": the distance to the closest object in the sensor cone.
+
+        Arguments:
+            None
+
+        Returns:
+            The distance in cm
+
+        """
+
+        closest = ultrasonic_max_distance_in_cm / 100
+
+        for x, y, radius in self.objects():
+
+            distance, bearing = self.locate(x, y)
+            half_width = math.degrees(math.asin(min(1.0, radius / max(distance, radius)))) # Angular half width of the object
+
+            if abs(bearing) <= ultrasonic_cone_half_angle + half_width:
+                closest = min(closest, max(0.0, distance - radius - car_radius))
+
+        reading = closest * 100 + self.random.gauss(0, ultrasonic_noise_in_cm)
+
+        return round(max(0.0, min(ultrasonic_max_distance_in_cm, reading)), 1)
+
+    def get_time_to_collision(self):
+
+        """
+        Stands in for "ultrasonic_sensor.get_time_to_collision": the time until the car reaches the closest object at the current closing speed.
+
+        Arguments:
+            None
+
+        Returns:
+            The time to collision in seconds (infinite if the distance isn't shrinking)
+
+        """
+
+        if not self.distance_history:
+            return math.inf
+
+        times = [time for time, _ in self.distance_history]
+        distances = [distance for _, distance in self.distance_history]
+
+        return time_to_collision_at(distances[-1], estimate_range_rate(times, distances, ultrasonic_max_distance_in_cm))
+
+    # --- Stand-in for "remote_controller" ---
+
+    def press(self, button_pin):
+
+        """
+        Stands in for "remote_controller.press".
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to press
+
+        Returns:
+            None
+
+        """
+
+        self.cancel_timed_changes(button_pin)
+        self.set_pin(button_pin, True)
+
+    def unpress(self, button_pin):
+
+        """
+        Stands in for "remote_controller.unpress".
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to release
+
+        Returns:
+            None
+
+        """
+
+        self.cancel_timed_changes(button_pin)
+        self.set_pin(button_pin, False)
+
+    def set_buttons(self, pin_states):
+
+        """
+        Stands in for "remote_controller.set_buttons".
+
+        Arguments:
+            "pin_states": A dictionary of GPIO pin: True to press or False to release
+
+        Returns:
+            None
+
+        """
+
+        for button_pin, pressed in sorted(pin_states.items(), key = lambda item: item[1]): # Releases first
+            self.cancel_timed_changes(button_pin)
+            self.set_pin(button_pin, pressed)
+
+    def set_throttle(self, throttle):
+
+        """
+        Stands in for "remote_controller.set_throttle". A fractional throttle scales the speed (the duty cycle averaged over time).
+
+        Arguments:
+            "throttle": The throttle from -1 (full speed backwards) to 1 (full speed forward)
+
+        Returns:
+            None
+
+        """
+
+        throttle = get_duty_cycle(throttle)
+
+        self.set_buttons({move_forward_button_pin: throttle > 0, move_backwards_button_pin: throttle < 0})
+        self.throttle_duty_cycle = abs(throttle)
+
+    def set_steer(self, steer):
+
+        """
+        Stands in for "remote_controller.set_steer". A fractional steering scales the turn rate (the duty cycle averaged over time).
+
+        Arguments:
+            "steer": The steering from -1 (full left) to 1 (full right)
+
+        Returns:
+            None
+
+        """
+
+        steer = get_duty_cycle(steer)
+
+        self.set_buttons({turn_right_button_pin: steer > 0, turn_left_button_pin: steer < 0})
+        self.steer_duty_cycle = abs(steer)
+
+    def press_for(self, button_pin, duration, delay = 0):
+
+        """
+        Stands in for "remote_controller.press_for".
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to press
+            "duration": The press duration in seconds (None to keep the button pressed)
+            "delay": The time in seconds before the press starts
+
+        Returns:
+            None
+
+        """
+
+        self.pulse_train(button_pin, duration, 0, 1, delay)
+
+    def pulse_train(self, button_pin, on_time, off_time, count, delay = 0):
+
+        """
+        Stands in for "remote_controller.pulse_train". The changes happen at the start of the tick they are due in.
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to press
+            "on_time": The press duration in seconds (None to keep the button pressed, for a single press)
+            "off_time": The release duration in seconds between presses
+            "count": The number of presses
+            "delay": The time in seconds before the first press starts
+
+        Returns:
+            None
+
+        """
+
+        self.cancel_timed_changes(button_pin)
+
+        for index in range(count):
+
+            press_time = self.time + delay + index * ((on_time or 0) + off_time)
+
+            if index == 0 and delay <= 0:
+                self.set_pin(button_pin, True)
+
+            else:
+                self.timed_changes.append((press_time, button_pin, True))
+
+            if on_time is not None:
+                self.timed_changes.append((press_time + on_time, button_pin, False))
+
+        self.timed_changes.sort(key = lambda change: change[0])
+
+    def cancel_timed_changes(self, button_pin):
+
+        """
+        Drops the timed changes of a button that haven't happened yet.
+
+        Arguments:
+            "button_pin": The GPIO pin of the button
+
+        Returns:
+            None
+
+        """
+
+        self.timed_changes = [change for change in self.timed_changes if change[1] != button_pin]
+
+    def apply_timed_changes(self):
+
+        """
+        Carries out the timed button changes that are due.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        while self.timed_changes and self.timed_changes[0][0] <= self.time:
+            _, button_pin, pressed = self.timed_changes.pop(0)
+            self.set_pin(button_pin, pressed)
+
+    def set_pin(self, button_pin, pressed):
+
+        """
+        Presses or releases a button, counting the changes.
+
+        Arguments:
+            "button_pin": The GPIO pin of the button
+            "pressed": True to press, False to release
+
+        Returns:
+            None
+
+        """
+
+        if self.pressed_pins[button_pin] != pressed:
+            self.actuator_toggles += 1
+
+        self.pressed_pins[button_pin] = pressed
+
+    def gpio_report(self):
+
+        """
+        Stands in for "remote_controller.actuator.report".
+
+        Arguments:
+            None
+
+        Returns:
+            The report text
+
+        """
+
+        return f"GPIO claims: {self.actuator_toggles}"
+
+    def check_button_press(self, button_pin):
+
+        """
+        Stands in for "remote_controller.check_button_press".
+
+        Arguments:
+            "button_pin": The GPIO pin of the button to check
+
+        Returns:
+            True if the button is pressed, False otherwise
+
+        """
+
+        return self.pressed_pins[button_pin]
+
+    # --- Metrics ---
+
+    def commanded_drive(self):
+
+        """
+        Gets the drive the pressed buttons command.
+
+        Arguments:
+            None
+
+        Returns:
+            "forward", "backward" or "stop"
+
+        """
+
+        if self.pressed_pins[move_forward_button_pin]:
+            return follow_logic.drive_forward
+
+        if self.pressed_pins[move_backwards_button_pin]:
+            return follow_logic.drive_backward
+
+        return follow_logic.drive_stop
+
+    def record_metrics(self):
+
+        """
+        Updates the metrics after a tick.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        settings = self.follow_settings
+        self.ticks += 1
+
+        visible, x_center_normalized, person_area_normalized = self.person_view()
+        distance, bearing = self.locate(self.person_x, self.person_y)
+
+        if visible:
+            self.visible_ticks += 1
+            self.camera_error_sum += abs(x_center_normalized - 0.5) * camera_horizontal_fov
+
+        if distance <= camera_range:
+            self.heading_error_sum += abs(bearing)
+            self.heading_error_ticks += 1
+
+        in_band = settings.target_minimum_area <= person_area_normalized <= settings.target_maximum_area
+
+        if visible and in_band and abs(bearing) <= settings.max_angle_offset:
+            self.on_target_ticks += 1
+
+        if person_area_normalized > settings.target_maximum_area:
+            self.overshoot_ticks += 1
+
+        # --- Reaction time: from a change of the ideal drive until the car drives that way ---
+
+        distance_is_unsafe = self.get_distance() <= settings.safe_distance_in_cm or self.get_time_to_collision() <= settings.minimum_time_to_collision
+
+        if distance_is_unsafe or not visible:
+            desired_drive = follow_logic.drive_stop
+
+        elif person_area_normalized < settings.target_minimum_area:
+            desired_drive = follow_logic.drive_forward
+
+        elif person_area_normalized > settings.target_maximum_area:
+            desired_drive = follow_logic.drive_backward
+
+        else:
+            desired_drive = follow_logic.drive_stop
+
+        if desired_drive != self.desired_drive:
+            self.desired_drive = desired_drive
+            self.reaction_start_time = self.time - simulation_tick_time # The change happened during the last tick
+
+        if self.reaction_start_time is not None and self.commanded_drive() == desired_drive:
+            self.reaction_times.append(self.time - self.reaction_start_time)
+            self.reaction_start_time = None
+
+    def metrics(self):
+
+        """
+        Summarizes the run.
+
+        Arguments:
+            None
+
+        Returns:
+            A dictionary of metrics
+
+        """
+
+        ticks = max(self.ticks, 1)
+        minutes = max(self.time, 1e-9) / 60
+
+        return {
+            "time_on_target": self.on_target_ticks / ticks,
+            "person_visible": self.visible_ticks / ticks,
+            "overshoot": self.overshoot_ticks / ticks,
+            "heading_error": self.heading_error_sum / max(self.heading_error_ticks, 1),
+            "camera_error": self.camera_error_sum / max(self.visible_ticks, 1),
+            "reaction_time": sum(self.reaction_times) / len(self.reaction_times) if self.reaction_times else 0.0,
+            "actuator_toggles": self.actuator_toggles,
+            "toggles_per_minute": self.actuator_toggles / minutes,
+            "collisions": self.collisions,
+            "collisions_per_minute": self.collisions / minutes
+        }
+
+# --- Stand-in modules ---
+
+def get_duty_cycle(value):
+
+    """
+    Rounds an axis value like "remote_controller.set_axis": pulses and gaps too short for the remote control are lengthened or closed.
+
+    Arguments:
+        "value": The axis value from -1 to 1
+
+    Returns:
+        The value the remote control acts on
+    
+    """
+
+    value = max(-1.0, min(1.0, value))
+    on_time = abs(value) * duty_cycle_period
+
+    if 0 < on_time < minimum_pulse_time:
+        return math.copysign(minimum_pulse_time / duty_cycle_period, value)
+
+    if duty_cycle_period - on_time < minimum_pulse_time:
+        return math.copysign(1.0, value)
+
+    return value
+
+class NullLogger:
+
+    """
+    Stands in for "robot_logger.RobotLogger": counts messages instead of writing them.
+
+    """
+
+    def next_iteration(self):
+
+        """
+        Does nothing (the simulator has no log iterations).
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+    def log(self, message, message_class = None, **fields):
+
+        """
+        Counts a log message.
+
+        Arguments:
+            "message": The log message
+            "message_class": The message class
+            "fields": Extra values
+
+        Returns:
+            None
+
+        """
+
+        if current_world is not None:
+            current_world.log_messages += 1
+
+    def close(self):
+
+        """
+        Does nothing (there is no file to close).
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+null_logger = NullLogger()
+
+def make_module(name, **attributes):
+
+    """
+    Creates a module object with the given attributes.
+
+    Arguments:
+        "name": The module name
+        "attributes": The module attributes
+
+    Returns:
+        The module
+
+    """
+
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+
+    return module
+
+def install_stand_ins():
+
+    """
+    Installs stand-ins for the hardware modules (camera, GPIO, ultrasonic sensor and log file) and imports "main" on top of them.
+    Must run before the real hardware modules or "main" are imported in this process.
+
+    Arguments:
+        None
+
+    Returns:
+        The "main" module
+
+    """
+
+    if "main" in sys.modules: # If "main" was already imported on top of the stand-ins
+        return sys.modules["main"]
+
+    sys.modules["ai_detection"] = make_module(
+        "ai_detection",
+        get_tracking_data = lambda: current_world.get_tracking_data(),
+        tracking_data_is_stale = lambda: False, # The simulated camera delivers a result every tick
+        trigger_recording_event = lambda event: None,
+        video_status_text = ""
+    )
+
+    sys.modules["remote_controller"] = make_module(
+        "remote_controller",
+        press = lambda button_pin: current_world.press(button_pin),
+        unpress = lambda button_pin: current_world.unpress(button_pin),
+        set_buttons = lambda pin_states: current_world.set_buttons(pin_states),
+        set_throttle = lambda throttle: current_world.set_throttle(throttle),
+        set_steer = lambda steer: current_world.set_steer(steer),
+        press_for = lambda button_pin, duration, delay = 0: current_world.press_for(button_pin, duration, delay),
+        pulse_train = lambda button_pin, on_time, off_time, count, delay = 0: current_world.pulse_train(button_pin, on_time, off_time, count, delay),
+        is_pressed = lambda button_pin: current_world.check_button_press(button_pin),
+        check_button_press = lambda button_pin: current_world.check_button_press(button_pin),
+        actuator = make_module("actuator", report = lambda: current_world.gpio_report()),
+        button_pins = button_pins,
+        move_forward_button_pin = move_forward_button_pin,
+        move_backwards_button_pin = move_backwards_button_pin,
+        turn_right_button_pin = turn_right_button_pin,
+        turn_left_button_pin = turn_left_button_pin
+    )
+
+    sys.modules["ultrasonic_sensor"] = make_module(
+        "ultrasonic_sensor",
+        get_distance = lambda: current_world.get_distance(),
+        get_time_to_collision = lambda: current_world.get_time_to_collision()
+    )
+
+    sys.modules["robot_logger"] = make_module(
+        "robot_logger",
+        configure = lambda path, **options: null_logger,
+        log = null_logger.log
+    )
+
+    import main
+
+    return main
+
+def default_follow_settings():
+
+    """
+    Gets the follow settings "main" uses.
+
+    Arguments:
+        None
+
+    Returns:
+        The follow settings
+
+    """
+
+    return install_stand_ins().follow_settings
+
+def run_simulation(follow_settings = None, pan_settings = default_pan_settings, duration = simulation_duration, seed = 0, obstacles = default_obstacles, standing_person = None):
+
+    """
+    Runs the follow loop of "main" against a simulated world, as fast as possible.
+
+    Arguments:
+        "follow_settings": The follow settings (default: the ones in "main")
+        "pan_settings": The pan controller settings
+        "duration": The simulated time in seconds
+        "seed": The random seed for the person's path and the sensor noise
+        "obstacles": The static obstacles
+        "standing_person": The (x, y) in meters where the person stands still (None for a walking person)
+
+    Returns:
+        A dictionary of metrics (plus the real-time factor of the run)
+
+    """
+
+    global current_world
+
+    main = install_stand_ins()
+
+    if follow_settings is None:
+        follow_settings = main.follow_settings
+
+    current_world = SimulatedWorld(follow_settings, pan_settings, obstacles, seed, standing_person)
+
+    main.clock = current_world.clock
+    main.follow_settings = follow_settings
+    main.safe_distance_in_cm = follow_settings.safe_distance_in_cm
+
+    state = follow_logic.initial_state
+    snapshot = SensorSnapshot(90, "none", False, None, float("inf"), 0.0)
+
+    start_time = time.perf_counter()
+
+    for _ in range(int(duration / simulation_tick_time)):
+        current_world.step(simulation_tick_time)
+        state, snapshot = main.follow_step(state, snapshot)
+        current_world.record_metrics()
+
+    metrics = current_world.metrics()
+    metrics["real_time_factor"] = duration / max(time.perf_counter() - start_time, 1e-9)
+
+    return metrics
+
+def check_standing_person(follow_settings = None, pan_settings = default_pan_settings):
+
+    """
+    Checks that the car reaches a person standing still in view and holds them on target (at every check position, without obstacles).
+    Metrics of a model or follow loop that fails this don't mean anything, so run it before comparing settings.
+
+    Arguments:
+        "follow_settings": The follow settings (default: the ones in "main")
+        "pan_settings": The pan controller settings
+
+    Returns:
+        A list of (position, metrics, passed) tuples, one per check position
+
+    """
+
+    results = []
+
+    for position in check_positions:
+        metrics = run_simulation(follow_settings, pan_settings, check_duration, obstacles = (), standing_person = position)
+        passed = metrics["time_on_target"] >= check_minimum_time_on_target and metrics["collisions"] == 0
+        results.append((position, metrics, passed))
+
+    return results
+
+def print_check(results):
+
+    """
+    Prints the results of "check_standing_person".
+
+    Arguments:
+        "results": The list of (position, metrics, passed) tuples
+
+    Returns:
+        True if every check passed, False otherwise
+
+    """
+
+    for (x, y), metrics, passed in results:
+        print(f"{'ok' if passed else 'FAILED':>6} | person standing at ({x}, {y}) m: on target {metrics['time_on_target']:.2f} of the time (at least {check_minimum_time_on_target}), heading error {metrics['heading_error']:.1f}°, collisions {metrics['collisions']}")
+
+    return all(passed for _, _, passed in results)
+
+# --- Execution ---
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type = float, default = simulation_duration, help = "Simulated seconds per run")
+    parser.add_argument("--seed", type = int, default = 0, help = "Random seed")
+    parser.add_argument("--check", action = "store_true", help = "Only check that a standing person is reached and held (exits with 1 if not)")
+    arguments = parser.parse_args()
+
+    if arguments.check:
+        sys.exit(0 if print_check(check_standing_person()) else 1)
+
+    for name, value in run_simulation(duration = arguments.duration, seed = arguments.seed).items():
+        print(f"{name}: {value:.3f}")
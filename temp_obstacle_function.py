@@ -2,27 +2,9 @@
 
 import ai_detection
 import time
-from gpiozero import Servo # Imports the Servo class from the gpiozero module for controlling servo motors
+import servo_service # Imports the servo_service module, which owns the camera servo (shared with "ai_detection")
 from main import stop, move_backwards, move_forward, turn, follow
 
-# --- Servo definitions ---
-
-servo_maximum_position = 1 # looking right
-servo_minimum_position = -1 # looking left
-servo_minimum_pulse_width = 0.5 / 1000
-servo_maximum_pulse_width = 2.5 / 1000
-servo_step = 0.04
-servo_threshold = 0.2
-servo_change_threshold = 0.005
-servo_smooth_speed = 0.005
-servo_step_delay = 0.005
-
-# --- Servo setup ---
-
-servo = Servo(18, min_pulse_width = servo_minimum_pulse_width, max_pulse_width = servo_maximum_pulse_width) # Creates a servo object on GPIO pin 18 with specified pulse widths
-servo_position = 0.0 # Creates a variable for the servo position and initializes its value to 0.0 (center position)
-servo.value = servo_position # Sets the position to "servo_position"
-
 def avoid_obstacle():
 
      """
@@ -271,7 +253,7 @@ def check_left():
      
      """
 
-     servo.value = servo_minimum_position
+     servo_service.move_to(servo_service.servo_minimum_position) # Waits until the camera looks left
 
 def check_right():
 
@@ -281,7 +263,7 @@ def check_right():
      
      """
 
-     servo.value = servo_maximum_position
+     servo_service.move_to(servo_service.servo_maximum_position) # Waits until the camera looks right
 
     
 
@@ -1,6 +1,10 @@
 # --- Imports ---
-from gpiozero import DistanceSensor
+import lgpio
+import numpy
+import threading
 import time
+from distance_filters import HampelFilter
+from range_rate import estimate_range_rate, get_time_to_collision as time_to_collision_at
 
 # --- Definitions ---
 echo_pin = 24
@@ -8,45 +12,158 @@ trigger_pin = 23
 max_distance_in_m = 2
 max_distance_in_cm = max_distance_in_m * 100
 distance_loop_update_time = 0.1
-timeout = 0.3  # seconds: how long to trust the last valid reading
-spike_threshold = 20  # cm, any sudden jump larger than this is ignored
+filter_window = 5  # readings the Hampel filter takes its median over
+filter_threshold = 3.0  # standard deviations from that median beyond which a reading is an outlier
+sample_rate = 20  # Hz: how often the sampler thread pings the sensor (an echo takes up to ~12 ms at 2 m)
+speed_of_sound_in_cm_per_s = 34300
+trigger_pulse_time = 0.00001  # the HC-SR04 starts a measurement after a trigger pulse of at least 10 µs
+echo_timeout = 2 * max_distance_in_cm / speed_of_sound_in_cm_per_s + 0.005  # seconds to wait for the end of an echo (round trip at max distance plus the sensor's start delay)
+history_length = 200  # samples kept in the ring buffer (10 s at 20 Hz)
+max_sample_age = 5 / sample_rate  # seconds after which the latest sample is stale (the sampler stopped or keeps failing)
+range_rate_window = 0.3  # seconds of samples the range rate is fitted over (6 samples at 20 Hz)
 
 # --- Sensor setup ---
-ultrasonic_sensor = DistanceSensor(echo=echo_pin, trigger=trigger_pin, max_distance=max_distance_in_m)
+# The sampler triggers the sensor and times the echo itself, so every sample is a new measurement, stored with the time it was taken
+# (gpiozero's DistanceSensor pings on its own thread at ~12-16 Hz, so polling it stored repeated readings with the wrong times)
+_gpio_handle = lgpio.gpiochip_open(0)
+lgpio.gpio_claim_output(_gpio_handle, trigger_pin, 0)
+lgpio.gpio_claim_alert(_gpio_handle, echo_pin, lgpio.BOTH_EDGES)
+
+_echo_rise_tick = None  # kernel timestamp (ns) of the rising edge of the current echo
+_echo_width = None  # length of the last complete echo in seconds
+_echo_done = threading.Event()
+
+def _on_echo_edge(chip, gpio, level, tick):
+    # Runs on lgpio's alert thread; the edges are timestamped by the kernel, so thread delays don't change the width
+    global _echo_rise_tick, _echo_width
+    if level == 1:
+        _echo_rise_tick = tick
+    elif level == 0 and _echo_rise_tick is not None:
+        _echo_width = (tick - _echo_rise_tick) / 1e9
+        _echo_done.set()
+
+_echo_callback = lgpio.callback(_gpio_handle, echo_pin, lgpio.BOTH_EDGES, _on_echo_edge)
 print("\nUltrasonic sensor initialized.")
 
 # --- Internal state ---
-_last_valid = max_distance_in_cm
-_last_time = time.time()
+# Any filter from "distance_filters" can be plugged in with set_filter (run distance_filters.py to compare them);
+# Hampel had the lowest stop latency at the fewest false stops, without delaying readings that aren't outliers
+_distance_filter = HampelFilter(filter_window, filter_threshold)
+
+_latest = round(max_distance_in_cm, 1)  # latest filtered distance, published by the sampler thread
+_latest_time = None  # monotonic time of the latest sample (None until the first one)
+_sample_errors = 0  # number of failed sensor reads
+
+_history_times = numpy.zeros(history_length)  # monotonic time of each sample
+_history_raw = numpy.zeros(history_length)  # raw distance of each sample (cm)
+_history_filtered = numpy.zeros(history_length)  # filtered distance of each sample (cm)
+_history_count = 0  # total number of samples written (the next one goes to _history_count % history_length)
+_history_lock = threading.Lock()
+
+_sampler_thread = None
 
 # --- Functions ---
+def _measure():
+    # One ping: the distance in cm (max_distance_in_cm if no echo ended in time)
+    global _echo_rise_tick
+    _echo_rise_tick = None
+    _echo_done.clear()
+
+    lgpio.gpio_write(_gpio_handle, trigger_pin, 1)
+    time.sleep(trigger_pulse_time)
+    lgpio.gpio_write(_gpio_handle, trigger_pin, 0)
+
+    if not _echo_done.wait(echo_timeout):
+        return max_distance_in_cm
+    return min(max_distance_in_cm, _echo_width * speed_of_sound_in_cm_per_s / 2)
+
+def _sample_loop():
+    global _latest, _latest_time, _history_count, _sample_errors
+
+    next_sample_time = time.monotonic()
+
+    while True:
+        try:
+            now = time.monotonic()
+            raw = _measure()  # pings the sensor and waits for the echo (at most echo_timeout)
+            filtered = _distance_filter.update(raw, now)
+
+            with _history_lock:
+                index = _history_count % history_length
+                _history_times[index] = now
+                _history_raw[index] = raw
+                _history_filtered[index] = filtered
+                _history_count += 1
+
+            _latest = round(filtered, 1)
+            _latest_time = now
+        except Exception as error:
+            # Keeps sampling; get_distance reports 0 once the latest sample is stale, so the car stops
+            _sample_errors += 1
+            if _sample_errors == 1 or _sample_errors % sample_rate == 0:
+                print(f"\nUltrasonic sensor read failed ({_sample_errors} times): {error!r}")
+
+        # Fixed rate: the next sample is due one period after the last one was due (skipping any that were missed)
+        next_sample_time += 1 / sample_rate
+        now = time.monotonic()
+        if next_sample_time < now:
+            next_sample_time = now
+        time.sleep(next_sample_time - now)
+
+def start_sampler():
+    global _sampler_thread
+
+    if _sampler_thread is None:
+        _sampler_thread = threading.Thread(target=_sample_loop, name="ultrasonic-sampler", daemon=True)
+        _sampler_thread.start()
+
+def set_filter(distance_filter):
+    # Replaces the filter the sampler applies (anything with update(distance, time) and reset())
+    global _distance_filter
+    distance_filter.reset()
+    _distance_filter = distance_filter
+
 def get_distance():
-    global _last_valid, _last_time
+    # Latest filtered distance in cm; never waits for the sensor
+    # Returns 0 (closest possible, so the safety stop triggers) if no sample arrived within max_sample_age
+    if _latest_time is None or time.monotonic() - _latest_time > max_sample_age:
+        return 0.0
+    return _latest
+
+def get_history(window):
+    # Samples of the last "window" seconds, oldest first: (times, raw distances, filtered distances) as NumPy arrays
+    with _history_lock:
+        count = min(_history_count, history_length)
+        order = numpy.arange(_history_count - count, _history_count) % history_length
+        times = _history_times[order]
+        raw = _history_raw[order]
+        filtered = _history_filtered[order]
 
-    raw = ultrasonic_sensor.distance * 100  #gets the distance from the sensor
-    now = time.time()
+    recent = times >= time.monotonic() - window
+    return times[recent], raw[recent], filtered[recent]
 
-    # Accept if difference is reasonable
-    if abs(raw - _last_valid) <= spike_threshold:
-        _last_valid = raw
-        _last_time = now
-        return round(_last_valid, 1)
+def get_range_rate(window=range_rate_window):
+    # How fast the filtered distance changes over the last "window" seconds, in cm/s (negative while closing in)
+    times, raw, filtered = get_history(window)
+    return estimate_range_rate(times.tolist(), filtered.tolist(), max_distance_in_cm)
 
-    # Otherwise check if last valid reading is recent enough
-    if now - _last_time <= timeout:
-        return round(_last_valid, 1)
+def get_time_to_collision(window=range_rate_window):
+    # Seconds until the distance reaches zero at the current closing speed (infinite if it isn't shrinking)
+    # No-echo samples and samples before a jump (an object entering the cone) are left out of the fit, see range_rate.py
+    times, raw, filtered = get_history(window)
+    if len(times) == 0:
+        return float("inf")
+    return time_to_collision_at(filtered[-1], estimate_range_rate(times.tolist(), filtered.tolist(), max_distance_in_cm))
 
-    # Spike persists too long, accept new reading
-    _last_valid = raw
-    _last_time = now
-    return round(_last_valid, 1)
+start_sampler()
 
 # --- Demo ---
 if __name__ == "__main__":
     try:
         while True:
             dist = get_distance()
-            print(f"Filtered distance: {dist:.1f} cm", end="\r")
+            times, raw, filtered = get_history(1.0)
+            print(f"Filtered distance: {dist:.1f} cm | Range rate: {get_range_rate():.0f} cm/s | Time to collision: {get_time_to_collision():.2f} s | Samples in the last second: {len(times)}", end="\r")
             time.sleep(distance_loop_update_time)
     except KeyboardInterrupt:
         print("\nStopped.")
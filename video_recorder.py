@@ -0,0 +1,259 @@
+# --- Imports ---
+
+import os # Imports the os module, which is used to build the clip file paths
+import datetime # Imports the datetime module for working with dates and times
+import threading # Imports the threading module, which is used to encode frames in the background
+import cv2 # Imports the OpenCV library for image and video processing
+import numpy # Imports the NumPy library for numerical operations on arrays
+
+# --- Definitions ---
+
+default_pool_size = 8 # Number of preallocated frame buffers (the length of the encoding queue)
+default_codec = "XVID" # Video codec for AVI format
+
+recording_mode_continuous = "continuous" # Every frame is recorded to one file
+recording_mode_events = "events" # Frames are kept in memory and only clips around events are recorded
+
+class VideoRecorder:
+
+    """
+    Records frames to video files, encoding them on a separate thread.
+
+    Frames are copied into a fixed pool of preallocated buffers that works as a ring buffer.
+    When the encoder falls behind, the oldest frame is overwritten (drop-oldest), so submitting a frame never waits for the encoder.
+
+    In continuous mode every frame is written to one file.
+    In events mode nothing is written until "trigger_event" is called, which writes a clip with the pre-roll frames kept in the ring buffer and the post-roll frames that follow.
+
+    """
+
+    def __init__(self, path, fps, size, pool_size = default_pool_size, codec = default_codec, color_conversion = cv2.COLOR_RGB2BGR, mode = recording_mode_continuous, pre_roll_time = 0, post_roll_time = 0):
+
+        """
+        Creates a video recorder and starts its encoder thread.
+
+        Arguments:
+            "path": The path of the video file (continuous mode) or of the directory the clips are saved in (events mode)
+            "fps": The frames per second of the video files
+            "size": The (width, height) of the frames
+            "pool_size": The number of frames that can wait for the encoder
+            "codec": The FourCC code of the video codec
+            "color_conversion": The OpenCV color conversion applied before encoding
+            "mode": Either "continuous" or "events"
+            "pre_roll_time": The seconds of frames before an event that a clip includes (events mode)
+            "post_roll_time": The seconds of frames after an event that a clip includes (events mode)
+
+        Returns:
+            None
+
+        """
+
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.codec = codec
+        self.color_conversion = color_conversion
+        self.mode = mode
+
+        self.pre_roll_frames = int(pre_roll_time * fps)
+        self.post_roll_frames = int(post_roll_time * fps)
+        self.pool_size = pool_size + self.pre_roll_frames # The ring buffer also holds the pre-roll frames
+
+        self.frame_buffers = None # Allocated on the first frame, when the frame shape is known
+        self.staged_frame = None # Buffer the encoder copies each frame out into, so the color conversion runs without the lock
+        self.encoded_frame = numpy.empty((size[1], size[0], 3), dtype = numpy.uint8) # Buffer the encoder converts each frame into
+
+        self.submitted_frames = 0 # Also the sequence number of the next submitted frame
+        self.next_encode_sequence = 0 # Sequence number of the next frame to encode
+        self.encoded_frames = 0
+        self.dropped_frames = 0
+        self.clip_count = 0
+
+        if mode == recording_mode_continuous:
+            self.clip_end_sequence = float("inf") # Every frame belongs to the recording
+            self.clip_path = path
+
+        else:
+            self.clip_end_sequence = 0 # No clip until an event is triggered
+            self.clip_path = None
+
+        self.clip_id = 0 # Changes with every new clip, so the encoder knows when its open file belongs to an older clip
+        self.video_writer = None # Opened by the encoder thread when the first frame of a recording is encoded
+        self.writer_clip_id = None # The clip the open file belongs to (only used by the encoder thread)
+
+        self.condition = threading.Condition() # Guards the buffers, counters and clip state, and wakes up the encoder
+        self.running = True
+
+        self.thread = threading.Thread(target = self.encode_loop, name = "video-recorder", daemon = True)
+        self.thread.start()
+
+    def submit(self, frame):
+
+        """
+        Stores a copy of a frame in the ring buffer. Never waits for the encoder.
+
+        Arguments:
+            "frame": The frame as a NumPy array
+
+        Returns:
+            None
+
+        """
+
+        with self.condition:
+
+            if self.frame_buffers is None: # If this is the first frame:
+                self.frame_buffers = numpy.empty((self.pool_size,) + frame.shape, dtype = frame.dtype) # Preallocate the ring buffer
+
+            numpy.copyto(self.frame_buffers[self.submitted_frames % self.pool_size], frame) # Copy into the buffer of the oldest frame
+
+            self.submitted_frames += 1
+            self.condition.notify()
+
+    def trigger_event(self, event):
+
+        """
+        Records a clip around an event (events mode). An event during a clip extends that clip instead of starting a new one.
+
+        Arguments:
+            "event": A short name for the event, used in the clip file name
+
+        Returns:
+            None
+
+        """
+
+        if self.mode != recording_mode_events:
+            return
+
+        with self.condition:
+
+            if self.next_encode_sequence < self.clip_end_sequence: # If a clip is still being recorded:
+                self.clip_end_sequence = max(self.clip_end_sequence, self.submitted_frames + self.post_roll_frames) # Extend it
+
+            else: # Else start a new clip with the pre-roll frames
+                timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                self.clip_path = os.path.join(self.path, f"{timestamp}_{event}.avi")
+                self.clip_id += 1
+                self.next_encode_sequence = max(0, self.submitted_frames - self.pre_roll_frames)
+                self.clip_end_sequence = self.submitted_frames + self.post_roll_frames
+
+            self.condition.notify()
+
+    def has_frame_to_encode(self):
+
+        """
+        Checks if a frame of the current recording is waiting to be encoded (the lock must be held).
+
+        Arguments:
+            None
+
+        Returns:
+            True if there is a frame to encode, False otherwise
+
+        """
+
+        return self.next_encode_sequence < min(self.submitted_frames, self.clip_end_sequence)
+
+    def is_clip_finished(self):
+
+        """
+        Checks if the open clip has all of its frames encoded (the lock must be held).
+
+        Arguments:
+            None
+
+        Returns:
+            True if the clip is finished, False otherwise
+
+        """
+
+        return self.video_writer is not None and self.next_encode_sequence >= self.clip_end_sequence
+
+    def encode_loop(self):
+
+        """
+        Encodes frames until the recorder is closed (runs on the encoder thread).
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        while True:
+
+            with self.condition:
+
+                while self.running and not self.has_frame_to_encode() and not self.is_clip_finished(): # Wait for a frame (or for the end of the clip)
+                    self.condition.wait()
+
+                clip_finished = self.is_clip_finished()
+
+                if not clip_finished:
+
+                    if not self.has_frame_to_encode(): # If closed and every frame is encoded:
+                        break
+
+                    oldest_stored_sequence = self.submitted_frames - self.pool_size
+
+                    if self.next_encode_sequence < oldest_stored_sequence: # If frames were overwritten before they could be encoded:
+                        self.dropped_frames += oldest_stored_sequence - self.next_encode_sequence
+                        self.next_encode_sequence = oldest_stored_sequence
+
+                    frame = self.frame_buffers[self.next_encode_sequence % self.pool_size]
+
+                    if self.staged_frame is None:
+                        self.staged_frame = numpy.empty_like(frame)
+
+                    numpy.copyto(self.staged_frame, frame) # Copies the frame out while the buffer is locked (much faster than converting it)
+
+                    self.next_encode_sequence += 1
+                    clip_path = self.clip_path
+                    clip_id = self.clip_id
+
+            if clip_finished: # If the clip is complete, close its file
+                self.video_writer.release()
+                self.video_writer = None
+                self.clip_count += 1
+                continue
+
+            if self.video_writer is not None and self.writer_clip_id != clip_id: # If a new clip started before the file of the last one was closed, close that file first
+                self.video_writer.release()
+                self.video_writer = None
+                self.clip_count += 1
+
+            if self.video_writer is None: # If this is the first frame of a recording, open its file
+                self.video_writer = cv2.VideoWriter(clip_path, cv2.VideoWriter_fourcc(*self.codec), self.fps, self.size)
+                self.writer_clip_id = clip_id
+
+            cv2.cvtColor(self.staged_frame, self.color_conversion, dst = self.encoded_frame) # Converts and encodes without holding the lock, so "submit" never waits for either
+            self.video_writer.write(self.encoded_frame)
+
+            self.encoded_frames += 1
+
+        if self.video_writer is not None: # Closes a recording that was still open
+            self.video_writer.release()
+            self.video_writer = None
+            self.clip_count += 1
+
+    def close(self):
+
+        """
+        Encodes the remaining frames of the current recording, stops the encoder thread and closes the video file.
+
+        Arguments:
+            None
+
+        Returns:
+            None
+
+        """
+
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+        self.thread.join()